@@ -0,0 +1,80 @@
+# backend/app/concurrency.py
+
+import asyncio
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class TooBusyError(Exception):
+    """Raised when the admission limit is reached; retry_after is a hint in seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Too many concurrent computations, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one in-flight computation.
+    Callers arriving while it runs await the same result instead of starting their own.
+    Must be used from a single event loop.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Returns (result, shared) - shared is True when another caller's computation was reused"""
+        future = self._inflight.get(key)
+        if future is not None:
+            # shield: a cancelled follower must not cancel the leader's computation
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await func()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved so an un-awaited future doesn't log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._inflight[key]
+
+
+class AdmissionLimiter:
+    """
+    Cap the number of concurrently running computations. Excess callers are
+    rejected with TooBusyError rather than queued, so bursts can't pile up work.
+    """
+
+    def __init__(self, max_concurrent: int):
+        self.max_concurrent = max_concurrent
+        self.running = 0
+        self.rejected = 0
+        # Moving average of recent durations, used for the Retry-After hint
+        self._avg_duration = 1.0
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self._avg_duration))
+
+    async def run(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        if self.running >= self.max_concurrent:
+            self.rejected += 1
+            raise TooBusyError(self.retry_after())
+
+        self.running += 1
+        start = time.perf_counter()
+        try:
+            return await func()
+        finally:
+            self.running -= 1
+            self._avg_duration = 0.7 * self._avg_duration + 0.3 * (time.perf_counter() - start)
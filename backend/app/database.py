@@ -2,17 +2,144 @@
 
 import sqlite3
 import json
+import logging
+import threading
+import time
 from datetime import datetime
-from typing import List, Optional, Dict
-from .models import Student, StudentCreate
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Iterable, Iterator, Tuple
+from pydantic import TypeAdapter
+from .models import Student, StudentCreate, MatchResult, GroupResult, DEFAULT_COHORT
+from .cache import TTLCache
+from .metrics import timed_query
+from .storage import StudentStore, RosterSnapshot, STUDENT_INSERT_COLUMNS, STUDENT_EXPORT_COLUMNS
+from .text_features import hash_text
 
-class Database:
-    def __init__(self, db_path: str = "smartroomie.db"):
+logger = logging.getLogger(__name__)
+
+_match_list_adapter = TypeAdapter(List[MatchResult])
+_group_list_adapter = TypeAdapter(List[GroupResult])
+
+def _groups_from_matches(results: str) -> bytes:
+    """
+    Encoded List[GroupResult] of a run stored in the original List[MatchResult] format.
+    Runs from before member_ids was recorded only name the first two members: their
+    groups keep those ids and the stored names, marked incomplete (legacy_names).
+    """
+    return _group_list_adapter.dump_json([
+        GroupResult(
+            member_ids=match.member_ids or list(dict.fromkeys([match.student1_id, match.student2_id])),
+            score=match.compatibility_score,
+            domain_scores=[match.habits_similarity, match.social_similarity, match.conflict_similarity,
+                           match.interests_similarity, match.text_similarity],
+            explanation=match.match_explanation,
+            legacy_names=None if match.member_ids else [match.student1_name, match.student2_name]
+        )
+        for match in _match_list_adapter.validate_json(results)
+    ], exclude_none=True)
+
+def _cohort_filter(cohort: Optional[str], column: str = "cohort") -> Tuple[str, Tuple]:
+    """WHERE clause and parameters limiting a query to one cohort (empty for all cohorts)"""
+    if cohort is None:
+        return "", ()
+    return f"WHERE {column} = ?", (cohort,)
+
+def _iter_export_batches(conn: sqlite3.Connection, order_by: str, batch_size: int,
+                         cohort: Optional[str] = None) -> Iterator[List[Tuple]]:
+    """Fetch students in STUDENT_EXPORT_COLUMNS order, batch_size rows at a time"""
+    where, params = _cohort_filter(cohort)
+    cursor = conn.execute(
+        f"SELECT {', '.join(STUDENT_EXPORT_COLUMNS)} FROM students {where} ORDER BY {order_by}", params
+    )
+    ac_index = STUDENT_EXPORT_COLUMNS.index('prefers_ac')
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        batch = []
+        for row in rows:
+            row = tuple(row)
+            batch.append(row[:ac_index] + (bool(row[ac_index]),) + row[ac_index + 1:])
+        yield batch
+
+# Columns copied into students_archive (the row keeps its students.id)
+_ARCHIVE_COLUMNS = ['id'] + STUDENT_EXPORT_COLUMNS + ['text_vector']
+
+def _archive_filter(cohort: Optional[str], created_before: Optional[datetime]) -> Tuple[str, Tuple]:
+    """WHERE condition selecting the students to archive (at least one filter is required)"""
+    clauses, params = [], []
+    if cohort is not None:
+        clauses.append("cohort = ?")
+        params.append(cohort)
+    if created_before is not None:
+        # created_at is CURRENT_TIMESTAMP text, which compares correctly as a string
+        clauses.append("created_at < ?")
+        params.append(created_before.isoformat(sep=' '))
+    if not clauses:
+        raise ValueError("Archiving needs a cohort or a created_before time")
+    return " AND ".join(clauses), tuple(params)
+
+class _SqliteSnapshot(RosterSnapshot):
+    """Reads inside one open read transaction (WAL keeps it isolated from later commits)"""
+
+    def __init__(self, database: "Database", conn: sqlite3.Connection, version: int, cohort: Optional[str]):
+        self._database = database
+        self._conn = conn
+        self.version = version
+        self.cohort = cohort
+
+    def get_student(self, student_id: str) -> Optional[Student]:
+        row = self._conn.execute("SELECT * FROM students WHERE student_id = ?", (student_id,)).fetchone()
+        if not row or (self.cohort is not None and row['cohort'] != self.cohort):
+            return None
+        return self._database._row_to_student(row)
+
+    def get_all_students(self) -> List[Student]:
+        where, params = _cohort_filter(self.cohort)
+        rows = self._conn.execute(
+            f"SELECT * FROM students {where} ORDER BY created_at DESC, id DESC", params
+        ).fetchall()
+        return [self._database._row_to_student(row) for row in rows]
+
+    def iter_student_batches(self, batch_size: int = 1000) -> Iterator[List[Tuple]]:
+        return _iter_export_batches(self._conn, "created_at DESC, id DESC", batch_size, self.cohort)
+
+    def iter_text_vectors(self, batch_size: int = 1000) -> Iterator[List[Optional[bytes]]]:
+        where, params = _cohort_filter(self.cohort)
+        cursor = self._conn.execute(
+            f"SELECT text_vector FROM students {where} ORDER BY created_at DESC, id DESC", params
+        )
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield [row[0] for row in rows]
+
+class Database(StudentStore):
+    """SQLite-backed student store"""
+
+    def __init__(self, db_path: str = "smartroomie.db", cache_size: int = 1024, cache_ttl: float = 300.0,
+                 cache_sync_interval: float = 0.1):
         self.db_path = db_path
+        # Read-through cache for get_student, invalidated by every mutator below
+        self.student_cache = TTLCache(max_size=cache_size, ttl_seconds=cache_ttl)
+        # Other processes write to the same file, so the change log is polled (at most
+        # once per interval) to drop the students they changed from this process's cache
+        self.cache_sync_interval = cache_sync_interval
+        self._synced_seq = 0  # change log position the cache reflects
+        self._next_sync = 0.0
+        self._sync_running = threading.Lock()
+        self._sync_conn: Optional[sqlite3.Connection] = None  # only used while holding _sync_running
+        self._cache_lock = threading.Lock()  # orders cache fills against sync invalidations
+        self.cache_syncs = 0
 
-    def get_connection(self):
-        """Get database connection"""
-        conn = sqlite3.connect(self.db_path)
+    def get_connection(self, check_same_thread: bool = True):
+        """
+        Get database connection. Generators that are streamed to a client pass
+        check_same_thread=False: Starlette resumes them on whichever threadpool
+        thread is free, but only ever one at a time.
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=check_same_thread)
         conn.row_factory = sqlite3.Row  # Enable column access by name
         return conn
 
@@ -20,6 +147,8 @@ class Database:
         """Initialize the database with required tables - REMOVED SMOKING PREFERENCES"""
         conn = self.get_connection()
         try:
+            # WAL lets match runs read a stable snapshot while registrations keep committing
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS students (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -41,18 +170,351 @@ class Database:
                     q9_sports_games INTEGER NOT NULL,
                     q10_movies_music INTEGER NOT NULL,
                     self_description TEXT,
+                    cohort TEXT NOT NULL DEFAULT 'default',
+                    text_vector BLOB,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            self._ensure_column(conn, "students", "cohort", "TEXT NOT NULL DEFAULT 'default'")
+            # Hashed self-description terms, built at registration so match runs never tokenize
+            if self._ensure_column(conn, "students", "text_vector", "BLOB"):
+                self._backfill_text_vectors(conn)
+            # Cohort-scoped reads (roster, snapshots, match runs) only touch their own rows
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_students_cohort
+                ON students (cohort, created_at, id)
+            """)
+            # Running totals for /api/stats, maintained by triggers so that
+            # reading the stats never has to scan the students table.
+            # Every key exists globally and per cohort ('cohort:<name>:' prefix).
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS student_counters (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            # Dropped and recreated so databases from before cohorts get the per-cohort keys
+            conn.executescript("""
+                DROP TRIGGER IF EXISTS students_counters_insert;
+                DROP TRIGGER IF EXISTS students_counters_delete;
+                DROP TRIGGER IF EXISTS students_counters_update;
+
+                CREATE TRIGGER students_counters_insert AFTER INSERT ON students
+                BEGIN
+                    INSERT INTO student_counters (key, value)
+                        SELECT prefix || suffix, 1 FROM
+                            (SELECT '' AS prefix UNION ALL SELECT 'cohort:' || NEW.cohort || ':'),
+                            (SELECT 'total' AS suffix UNION ALL SELECT 'gender:' || NEW.gender
+                             UNION ALL SELECT 'ac:' || NEW.prefers_ac)
+                        WHERE true
+                        ON CONFLICT(key) DO UPDATE SET value = value + 1;
+                END;
+
+                CREATE TRIGGER students_counters_delete AFTER DELETE ON students
+                BEGIN
+                    UPDATE student_counters SET value = value - 1
+                        WHERE key IN ('total', 'gender:' || OLD.gender, 'ac:' || OLD.prefers_ac,
+                                      'cohort:' || OLD.cohort || ':total',
+                                      'cohort:' || OLD.cohort || ':gender:' || OLD.gender,
+                                      'cohort:' || OLD.cohort || ':ac:' || OLD.prefers_ac);
+                END;
+
+                CREATE TRIGGER students_counters_update
+                AFTER UPDATE OF gender, prefers_ac, cohort ON students
+                BEGIN
+                    UPDATE student_counters SET value = value - 1
+                        WHERE key IN ('total', 'gender:' || OLD.gender, 'ac:' || OLD.prefers_ac,
+                                      'cohort:' || OLD.cohort || ':total',
+                                      'cohort:' || OLD.cohort || ':gender:' || OLD.gender,
+                                      'cohort:' || OLD.cohort || ':ac:' || OLD.prefers_ac);
+                    INSERT INTO student_counters (key, value)
+                        SELECT prefix || suffix, 1 FROM
+                            (SELECT '' AS prefix UNION ALL SELECT 'cohort:' || NEW.cohort || ':'),
+                            (SELECT 'total' AS suffix UNION ALL SELECT 'gender:' || NEW.gender
+                             UNION ALL SELECT 'ac:' || NEW.prefers_ac)
+                        WHERE true
+                        ON CONFLICT(key) DO UPDATE SET value = value + 1;
+                END;
+            """)
+            # Students moved out of the live table at the end of a term (see archive_students)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS students_archive (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    student_id TEXT NOT NULL,
+                    contact_info TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    prefers_ac BOOLEAN NOT NULL,
+                    room_capacity INTEGER NOT NULL,
+                    gender TEXT NOT NULL,
+                    q1_sleep INTEGER NOT NULL,
+                    q2_tidy INTEGER NOT NULL,
+                    q3_noise INTEGER NOT NULL,
+                    q4_friends_freq INTEGER NOT NULL,
+                    q5_friday_pref INTEGER NOT NULL,
+                    q6_overnight_guests INTEGER NOT NULL,
+                    q7_conflict_style INTEGER NOT NULL,
+                    q8_alone_time INTEGER NOT NULL,
+                    q9_sports_games INTEGER NOT NULL,
+                    q10_movies_music INTEGER NOT NULL,
+                    self_description TEXT,
+                    cohort TEXT NOT NULL,
+                    text_vector BLOB,
+                    created_at TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_students_archive_student
+                ON students_archive (student_id)
+            """)
+            # Append-only change log used for delta sync; deletions stay as tombstones
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS student_changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    student_id TEXT NOT NULL,
+                    operation TEXT NOT NULL,
+                    cohort TEXT NOT NULL DEFAULT 'default',
+                    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            self._ensure_column(conn, "student_changes", "cohort", "TEXT NOT NULL DEFAULT 'default'")
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_student_changes_student
+                ON student_changes (student_id, seq)
+            """)
+            # Per-cohort versions: MAX(seq) for one cohort is a single index probe
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_student_changes_cohort
+                ON student_changes (cohort, seq)
+            """)
+            self._backfill_change_log(conn)
+            # Stored match runs; results are kept pre-encoded so serving a run never decodes them
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS match_runs (
+                    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    roster_version INTEGER NOT NULL,
+                    match_count INTEGER NOT NULL,
+                    results TEXT NOT NULL,
+                    seed INTEGER,
+                    cohort TEXT NOT NULL DEFAULT 'default',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            self._ensure_column(conn, "match_runs", "seed", "INTEGER")
+            self._ensure_column(conn, "match_runs", "cohort", "TEXT NOT NULL DEFAULT 'default'")
+            # 'matches': List[MatchResult] written before the group format, 'groups': List[GroupResult]
+            self._ensure_column(conn, "match_runs", "result_format", "TEXT NOT NULL DEFAULT 'matches'")
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_match_runs_cohort
+                ON match_runs (cohort, run_id)
+            """)
+            self._rebuild_counters(conn)
             conn.commit()
-            print("✅ Database table created/verified (smoking preferences removed)")
-        except Exception as e:
-            print(f"❌ Database initialization error: {e}")
+            # The cache starts empty, so it is in sync with the log as it is now
+            self._synced_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM student_changes").fetchone()[0]
+            logger.info("Database tables created/verified", extra={"db_path": self.db_path})
+        except Exception:
+            logger.exception("Database initialization error")
             raise
         finally:
             conn.close()
 
+    def cache_stats(self) -> Dict:
+        """Hit/miss metrics for the student cache, and how far it has caught up with the change log"""
+        return {"students": {
+            **self.student_cache.stats(),
+            "synced_seq": self._synced_seq,
+            "syncs": self.cache_syncs,
+            "sync_interval_seconds": self.cache_sync_interval
+        }}
+
+    def _sync_cache(self):
+        """
+        Invalidate cached students changed by any process since the last sync. Costs one
+        indexed MAX(seq) query when nothing changed; runs at most once per interval and
+        never makes a second thread wait for it.
+        """
+        now = time.monotonic()
+        if now < self._next_sync or not self._sync_running.acquire(blocking=False):
+            return
+        try:
+            self._next_sync = now + self.cache_sync_interval
+            since = self._synced_seq
+            limit = self.student_cache.max_size
+            # Kept open: connecting costs far more than the query itself
+            if self._sync_conn is None:
+                self._sync_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn = self._sync_conn
+            latest = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM student_changes").fetchone()[0]
+            changed = []
+            if latest > since:
+                changed = [row[0] for row in conn.execute(
+                    "SELECT student_id FROM student_changes WHERE seq > ? AND seq <= ? ORDER BY seq LIMIT ?",
+                    (since, latest, limit + 1)
+                )]
+
+            with self._cache_lock:
+                # More changes than the cache holds (or a reset log): dropping everything is cheaper
+                if latest < since or len(changed) > limit:
+                    self.student_cache.clear()
+                else:
+                    for student_id in changed:
+                        self.student_cache.invalidate(student_id)
+                self._synced_seq = latest
+                self.cache_syncs += 1
+        finally:
+            self._sync_running.release()
+
+    def _cache_student(self, student: Student, read_seq: int):
+        """Cache a student read at change token read_seq, unless a sync has already moved past that read"""
+        with self._cache_lock:
+            if read_seq >= self._synced_seq:
+                self.student_cache.set(student.student_id, student)
+
+    def _row_to_student(self, row: sqlite3.Row) -> Student:
+        """Convert a students table row into a Student model"""
+        return Student(
+            id=row['id'],
+            name=row['name'],
+            student_id=row['student_id'],
+            contact_info=row['contact_info'],
+            email=row['email'],
+            prefers_ac=bool(row['prefers_ac']),
+            room_capacity=row['room_capacity'],
+            gender=row['gender'],
+            q1_sleep=row['q1_sleep'],
+            q2_tidy=row['q2_tidy'],
+            q3_noise=row['q3_noise'],
+            q4_friends_freq=row['q4_friends_freq'],
+            q5_friday_pref=row['q5_friday_pref'],
+            q6_overnight_guests=row['q6_overnight_guests'],
+            q7_conflict_style=row['q7_conflict_style'],
+            q8_alone_time=row['q8_alone_time'],
+            q9_sports_games=row['q9_sports_games'],
+            q10_movies_music=row['q10_movies_music'],
+            self_description=row['self_description'],
+            cohort=row['cohort'],
+            created_at=datetime.fromisoformat(row['created_at']),
+            updated_at=datetime.fromisoformat(row['updated_at'])
+        )
+
+    def _log_change(self, conn: sqlite3.Connection, student_id: str, operation: str):
+        """
+        Append an entry to the change log, tagged with the student's cohort
+        (call inside the mutator's transaction, while the student's row still exists)
+        """
+        conn.execute(
+            "INSERT INTO student_changes (student_id, operation, cohort) "
+            "SELECT ?, ?, cohort FROM students WHERE student_id = ?",
+            (student_id, operation, student_id)
+        )
+
+    def _ensure_column(self, conn: sqlite3.Connection, table: str, column: str, declaration: str):
+        """Add a column to a table created by an older version of init_db, returns True if it was added"""
+        columns = [row['name'] for row in conn.execute(f"PRAGMA table_info({table})")]
+        if column in columns:
+            return False
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+        return True
+
+    def _backfill_text_vectors(self, conn: sqlite3.Connection):
+        """Hash the self-descriptions of students registered before text vectors were stored"""
+        rows = conn.execute(
+            "SELECT id, self_description FROM students WHERE self_description IS NOT NULL"
+        ).fetchall()
+        conn.executemany(
+            "UPDATE students SET text_vector = ? WHERE id = ?",
+            [(hash_text(row['self_description']), row['id']) for row in rows]
+        )
+
+    def _backfill_change_log(self, conn: sqlite3.Connection):
+        """
+        Log an insert for students registered before the change log existed, so an
+        upgraded database doesn't report version 0 (an empty roster) for them
+        """
+        conn.execute("""
+            INSERT INTO student_changes (student_id, operation, cohort)
+            SELECT student_id, 'insert', cohort FROM students AS s
+            WHERE NOT EXISTS (SELECT 1 FROM student_changes AS c WHERE c.student_id = s.student_id)
+            ORDER BY created_at, id
+        """)
+
+    def _rebuild_counters(self, conn: sqlite3.Connection):
+        """Recompute the stats counters from the students table (run once at startup)"""
+        conn.execute("DELETE FROM student_counters")
+        conn.execute("""
+            INSERT INTO student_counters (key, value)
+            SELECT 'total', COUNT(*) FROM students
+            UNION ALL
+            SELECT 'gender:' || gender, COUNT(*) FROM students GROUP BY gender
+            UNION ALL
+            SELECT 'ac:' || prefers_ac, COUNT(*) FROM students GROUP BY prefers_ac
+            UNION ALL
+            SELECT 'cohort:' || cohort || ':total', COUNT(*) FROM students GROUP BY cohort
+            UNION ALL
+            SELECT 'cohort:' || cohort || ':gender:' || gender, COUNT(*) FROM students GROUP BY cohort, gender
+            UNION ALL
+            SELECT 'cohort:' || cohort || ':ac:' || prefers_ac, COUNT(*) FROM students GROUP BY cohort, prefers_ac
+        """)
+
+    @timed_query()
+    def ping(self) -> bool:
+        """Cheap liveness probe - runs a trivial query without touching any table"""
+        conn = self.get_connection()
+        try:
+            return conn.execute("SELECT 1").fetchone()[0] == 1
+        finally:
+            conn.close()
+
+    @timed_query()
+    def integrity_check(self) -> str:
+        """Run SQLite's quick_check (reads the whole file, use for deep health checks only)"""
+        conn = self.get_connection()
+        try:
+            return conn.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            conn.close()
+
+    @timed_query()
+    def get_stats(self, cohort: Optional[str] = None) -> Dict[str, int]:
+        """Get student counts by gender and AC preference from the maintained counters"""
+        prefix = f"cohort:{cohort}:" if cohort is not None else ""
+        conn = self.get_connection()
+        try:
+            keys = [prefix + key for key in ('total', 'gender:Male', 'gender:Female', 'gender:Other', 'ac:1')]
+            rows = conn.execute(
+                f"SELECT key, value FROM student_counters WHERE key IN ({', '.join('?' for _ in keys)})", keys
+            ).fetchall()
+            counters = {row['key'][len(prefix):]: row['value'] for row in rows}
+            total = counters.get('total', 0)
+            ac_preference = counters.get('ac:1', 0)
+            return {
+                "total_students": total,
+                "male_students": counters.get('gender:Male', 0),
+                "female_students": counters.get('gender:Female', 0),
+                "other_students": counters.get('gender:Other', 0),
+                "ac_preference": ac_preference,
+                "non_ac_preference": total - ac_preference
+            }
+        finally:
+            conn.close()
+
+    @timed_query()
+    def list_cohorts(self) -> Dict[str, int]:
+        """Student count per cohort, from the maintained counters"""
+        conn = self.get_connection()
+        try:
+            rows = conn.execute(
+                "SELECT key, value FROM student_counters WHERE key LIKE 'cohort:%:total' AND value > 0 ORDER BY key"
+            ).fetchall()
+            return {row['key'][len('cohort:'):-len(':total')]: row['value'] for row in rows}
+        finally:
+            conn.close()
+
+    @timed_query()
     def create_student(self, student_data: StudentCreate) -> str:
         """Create a new student profile - REMOVED SMOKING PREFERENCES"""
         conn = self.get_connection()
@@ -63,8 +525,8 @@ class Database:
                     name, student_id, contact_info, email, prefers_ac, room_capacity, gender,
                     q1_sleep, q2_tidy, q3_noise, q4_friends_freq, q5_friday_pref,
                     q6_overnight_guests, q7_conflict_style, q8_alone_time, 
-                    q9_sports_games, q10_movies_music, self_description
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    q9_sports_games, q10_movies_music, self_description, cohort, text_vector
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
                 student_data.name,
                 student_data.student_id,
@@ -83,9 +545,13 @@ class Database:
                 student_data.q8_alone_time,
                 student_data.q9_sports_games,
                 student_data.q10_movies_music,
-                student_data.self_description
+                student_data.self_description,
+                student_data.cohort,
+                hash_text(student_data.self_description)
             ))
+            self._log_change(conn, student_data.student_id, 'insert')
             conn.commit()
+            self.student_cache.invalidate(student_data.student_id)
             return student_data.student_id
         except sqlite3.IntegrityError as e:
             if "UNIQUE constraint failed" in str(e):
@@ -96,92 +562,66 @@ class Database:
         finally:
             conn.close()
 
+    @timed_query()
     def get_student(self, student_id: str) -> Optional[Student]:
-        """Get a student by their ID"""
+        """Get a student by their ID (served from the student cache when possible)"""
+        self._sync_cache()
+        student = self.student_cache.get(student_id)
+        if student is not None:
+            return student
+
         conn = self.get_connection()
         try:
+            # One read transaction, so the token says exactly which changes the row includes
+            conn.execute("BEGIN")
+            read_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM student_changes").fetchone()[0]
             cursor = conn.cursor()
             cursor.execute("SELECT * FROM students WHERE student_id = ?", (student_id,))
             row = cursor.fetchone()
             
             if row:
-                return Student(
-                    id=row['id'],
-                    name=row['name'],
-                    student_id=row['student_id'],
-                    contact_info=row['contact_info'],
-                    email=row['email'],
-                    prefers_ac=bool(row['prefers_ac']),
-                    room_capacity=row['room_capacity'],
-                    gender=row['gender'],
-                    q1_sleep=row['q1_sleep'],
-                    q2_tidy=row['q2_tidy'],
-                    q3_noise=row['q3_noise'],
-                    q4_friends_freq=row['q4_friends_freq'],
-                    q5_friday_pref=row['q5_friday_pref'],
-                    q6_overnight_guests=row['q6_overnight_guests'],
-                    q7_conflict_style=row['q7_conflict_style'],
-                    q8_alone_time=row['q8_alone_time'],
-                    q9_sports_games=row['q9_sports_games'],
-                    q10_movies_music=row['q10_movies_music'],
-                    self_description=row['self_description'],
-                    created_at=datetime.fromisoformat(row['created_at']),
-                    updated_at=datetime.fromisoformat(row['updated_at'])
-                )
+                student = self._row_to_student(row)
+                self._cache_student(student, read_seq)
+                return student
             return None
         finally:
             conn.close()
 
-    def get_all_students(self) -> List[Student]:
-        """Get all students from database"""
+    @timed_query()
+    def get_all_students(self, cohort: Optional[str] = None) -> List[Student]:
+        """Get all students from database (one cohort's, via idx_students_cohort, if given)"""
+        where, params = _cohort_filter(cohort)
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM students ORDER BY created_at DESC")
+            cursor.execute(f"SELECT * FROM students {where} ORDER BY created_at DESC, id DESC", params)
             rows = cursor.fetchall()
             
             students = []
             for row in rows:
-                student = Student(
-                    id=row['id'],
-                    name=row['name'],
-                    student_id=row['student_id'],
-                    contact_info=row['contact_info'],
-                    email=row['email'],
-                    prefers_ac=bool(row['prefers_ac']),
-                    room_capacity=row['room_capacity'],
-                    gender=row['gender'],
-                    q1_sleep=row['q1_sleep'],
-                    q2_tidy=row['q2_tidy'],
-                    q3_noise=row['q3_noise'],
-                    q4_friends_freq=row['q4_friends_freq'],
-                    q5_friday_pref=row['q5_friday_pref'],
-                    q6_overnight_guests=row['q6_overnight_guests'],
-                    q7_conflict_style=row['q7_conflict_style'],
-                    q8_alone_time=row['q8_alone_time'],
-                    q9_sports_games=row['q9_sports_games'],
-                    q10_movies_music=row['q10_movies_music'],
-                    self_description=row['self_description'],
-                    created_at=datetime.fromisoformat(row['created_at']),
-                    updated_at=datetime.fromisoformat(row['updated_at'])
-                )
+                student = self._row_to_student(row)
                 students.append(student)
             
             return students
         finally:
             conn.close()
 
+    @timed_query()
     def delete_student(self, student_id: str) -> bool:
         """Delete a student from database"""
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
+            # Logged first: the change entry takes its cohort from the row being deleted
+            self._log_change(conn, student_id, 'delete')
             cursor.execute("DELETE FROM students WHERE student_id = ?", (student_id,))
             conn.commit()
+            self.student_cache.invalidate(student_id)
             return cursor.rowcount > 0
         finally:
             conn.close()
 
+    @timed_query()
     def update_student_timestamp(self, student_id: str):
         """Update the updated_at timestamp for a student"""
         conn = self.get_connection()
@@ -191,6 +631,257 @@ class Database:
                 "UPDATE students SET updated_at = CURRENT_TIMESTAMP WHERE student_id = ?",
                 (student_id,)
             )
+            if cursor.rowcount > 0:
+                self._log_change(conn, student_id, 'update')
+            conn.commit()
+            self.student_cache.invalidate(student_id)
+        finally:
+            conn.close()
+
+    @timed_query()
+    def get_changes_since(self, since: int = 0, cohort: Optional[str] = None) -> Dict:
+        """
+        Get students inserted, updated or deleted after change token `since`.
+        A token of 0 (or one newer than the log, e.g. after a reset) returns the full roster.
+        With a cohort, both the token and the changes are limited to that cohort.
+        """
+        where, params = _cohort_filter(cohort)
+        conn = self.get_connection()
+        try:
+            # One read transaction so the rows and the returned token agree
+            conn.execute("BEGIN")
+            token = conn.execute(f"SELECT COALESCE(MAX(seq), 0) FROM student_changes {where}", params).fetchone()[0]
+
+            if since <= 0 or since > token:
+                rows = conn.execute(
+                    f"SELECT * FROM students {where} ORDER BY created_at DESC, id DESC", params
+                ).fetchall()
+                return {
+                    "token": token,
+                    "full": True,
+                    "students": [self._row_to_student(row) for row in rows],
+                    "deleted": []
+                }
+
+            cohort_clause = "AND cohort = ?" if cohort is not None else ""
+            changed_ids = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT student_id FROM student_changes WHERE seq > ? {cohort_clause}", (since,) + params
+            )]
+            # A student re-registered in another cohort counts as deleted from this one
+            rows = conn.execute(f"""
+                SELECT * FROM students
+                WHERE student_id IN (SELECT student_id FROM student_changes WHERE seq > ? {cohort_clause})
+                {cohort_clause}
+                ORDER BY created_at DESC
+            """, (since,) + params + params).fetchall()
+            students = [self._row_to_student(row) for row in rows]
+            present = {s.student_id for s in students}
+            return {
+                "token": token,
+                "full": False,
+                "students": students,
+                "deleted": [sid for sid in changed_ids if sid not in present]
+            }
+        finally:
+            conn.close()
+
+    def iter_student_batches(self, batch_size: int = 1000) -> Iterator[List[Tuple]]:
+        """
+        Stream the roster as batches of tuples in STUDENT_EXPORT_COLUMNS order.
+        Only one batch is held in memory at a time; may be resumed on another thread.
+        """
+        conn = self.get_connection(check_same_thread=False)
+        try:
+            yield from _iter_export_batches(conn, "id", batch_size)
+        finally:
+            conn.close()
+
+    @timed_query()
+    def create_students_bulk(self, students: Iterable[Tuple[int, StudentCreate]],
+                             batch_size: int = 500, max_errors: int = 100) -> Dict:
+        """
+        Insert (row_number, StudentCreate) pairs in batched transactions.
+        A failing row is counted and skipped without aborting its batch;
+        only the first `max_errors` failures are described in the report.
+        """
+        columns = STUDENT_INSERT_COLUMNS + ['text_vector']
+        insert_sql = f"""
+            INSERT INTO students ({', '.join(columns)})
+            VALUES ({', '.join('?' for _ in columns)})
+        """
+        inserted = 0
+        failed = 0
+        errors = []
+        conn = self.get_connection()
+        try:
+            pending = 0
+            for row_number, student_data in students:
+                try:
+                    conn.execute(insert_sql, tuple(
+                        getattr(student_data, column) for column in STUDENT_INSERT_COLUMNS
+                    ) + (hash_text(student_data.self_description),))
+                    self._log_change(conn, student_data.student_id, 'insert')
+                    self.student_cache.invalidate(student_data.student_id)
+                    inserted += 1
+                except sqlite3.IntegrityError as e:
+                    if "UNIQUE constraint failed" in str(e):
+                        message = f"Student ID {student_data.student_id} already exists"
+                    else:
+                        message = f"Database constraint error: {e}"
+                    failed += 1
+                    if len(errors) < max_errors:
+                        errors.append({"row": row_number, "student_id": student_data.student_id, "error": message})
+
+                pending += 1
+                if pending >= batch_size:
+                    conn.commit()
+                    pending = 0
+            conn.commit()
+            return {"inserted": inserted, "failed": failed, "errors": errors}
+        finally:
+            conn.close()
+
+    def archive_students(self, cohort: Optional[str] = None, created_before: Optional[datetime] = None,
+                         batch_size: int = 1000) -> Iterator[Dict[str, int]]:
+        """
+        Move matching students into students_archive, batch_size rows per transaction,
+        so writers are only ever blocked for one batch. Each batch is copied, logged as
+        deletions and deleted in the same transaction; the counter triggers keep
+        /api/stats right. Yields progress once up front and after every batch (never
+        inside a transaction), and may be resumed on another thread.
+        """
+        where, params = _archive_filter(cohort, created_before)
+        columns = ', '.join(_ARCHIVE_COLUMNS)
+        conn = self.get_connection(check_same_thread=False)
+        try:
+            total = conn.execute(f"SELECT COUNT(*) FROM students WHERE {where}", params).fetchone()[0]
+            archived = 0
+            yield {"archived": archived, "total": total}
+            while True:
+                # Take the write lock before reading the batch, so nothing changes under it
+                conn.execute("BEGIN IMMEDIATE")
+                rows = conn.execute(
+                    f"SELECT id, student_id FROM students WHERE {where} ORDER BY id LIMIT ?", params + (batch_size,)
+                ).fetchall()
+                if not rows:
+                    conn.rollback()
+                    break
+                batch_where, batch_params = f"{where} AND id <= ?", params + (rows[-1]['id'],)
+                conn.execute(
+                    f"INSERT INTO students_archive ({columns}) SELECT {columns} FROM students WHERE {batch_where}",
+                    batch_params
+                )
+                conn.execute(
+                    "INSERT INTO student_changes (student_id, operation, cohort) "
+                    f"SELECT student_id, 'delete', cohort FROM students WHERE {batch_where} ORDER BY id",
+                    batch_params
+                )
+                conn.execute(f"DELETE FROM students WHERE {batch_where}", batch_params)
+                conn.commit()
+                for row in rows:
+                    self.student_cache.invalidate(row['student_id'])
+                archived += len(rows)
+                yield {"archived": archived, "total": max(total, archived)}
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.close()
+
+    @timed_query()
+    def optimize_storage(self, vacuum: bool = False) -> Dict:
+        """ANALYZE, then optionally VACUUM (rewrites the whole file and blocks writers while it runs)"""
+        conn = self.get_connection()
+        try:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            size_before = conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+            conn.execute("ANALYZE")
+            conn.commit()
+            if vacuum:
+                conn.execute("VACUUM")
+            size_after = conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+            return {"analyzed": True, "vacuumed": vacuum, "size_bytes_before": size_before, "size_bytes_after": size_after}
+        finally:
+            conn.close()
+
+    @timed_query()
+    def get_version(self, cohort: Optional[str] = None) -> int:
+        """Roster version: the latest change token (MAX on the rowid or idx_student_changes_cohort, so O(1))"""
+        where, params = _cohort_filter(cohort)
+        conn = self.get_connection()
+        try:
+            return conn.execute(f"SELECT COALESCE(MAX(seq), 0) FROM student_changes {where}", params).fetchone()[0]
+        finally:
+            conn.close()
+
+    @timed_query()
+    def get_student_version(self, student_id: str) -> int:
+        """Latest change token for one student (uses idx_student_changes_student)"""
+        conn = self.get_connection()
+        try:
+            return conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM student_changes WHERE student_id = ?", (student_id,)
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+    @contextmanager
+    def read_snapshot(self, cohort: Optional[str] = None) -> Iterator[RosterSnapshot]:
+        """Open a read transaction; every read through the snapshot sees the same roster version"""
+        where, params = _cohort_filter(cohort)
+        conn = self.get_connection()
+        try:
+            conn.execute("BEGIN")
+            # The first read pins the WAL snapshot, so the version and the rows agree
+            version = conn.execute(f"SELECT COALESCE(MAX(seq), 0) FROM student_changes {where}", params).fetchone()[0]
+            yield _SqliteSnapshot(self, conn, version, cohort)
+        finally:
+            conn.rollback()
+            conn.close()
+
+    @timed_query()
+    def save_match_run(self, groups: List[GroupResult], roster_version: int,
+                       seed: Optional[int] = None, cohort: str = DEFAULT_COHORT) -> int:
+        """Store a match run's groups in one transaction, returns the new run_id"""
+        results = _group_list_adapter.dump_json(groups, exclude_none=True).decode('utf-8')
+        conn = self.get_connection()
+        try:
+            cursor = conn.execute(
+                "INSERT INTO match_runs (roster_version, match_count, results, seed, cohort, result_format) "
+                "VALUES (?, ?, ?, ?, ?, 'groups')",
+                (roster_version, len(groups), results, seed, cohort)
+            )
             conn.commit()
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    @timed_query()
+    def get_match_run(self, run_id: int) -> Optional[Dict]:
+        """Get a stored match run with its groups still encoded as JSON (runs stored as matches are converted)"""
+        conn = self.get_connection()
+        try:
+            row = conn.execute("SELECT * FROM match_runs WHERE run_id = ?", (run_id,)).fetchone()
+            if not row:
+                return None
+            return {
+                "run_id": row['run_id'],
+                "cohort": row['cohort'],
+                "roster_version": row['roster_version'],
+                "seed": row['seed'],
+                "created_at": datetime.fromisoformat(row['created_at']),
+                "group_count": row['match_count'],
+                "groups_json": (row['results'].encode('utf-8') if row['result_format'] == 'groups'
+                                else _groups_from_matches(row['results']))
+            }
+        finally:
+            conn.close()
+
+    @timed_query()
+    def get_latest_match_run_id(self, cohort: Optional[str] = None) -> Optional[int]:
+        """run_id of the most recent match run (of one cohort, via idx_match_runs_cohort)"""
+        where, params = _cohort_filter(cohort)
+        conn = self.get_connection()
+        try:
+            return conn.execute(f"SELECT MAX(run_id) FROM match_runs {where}", params).fetchone()[0]
         finally:
-            conn.close()
\ No newline at end of file
+            conn.close()
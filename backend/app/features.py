@@ -0,0 +1,330 @@
+# backend/app/features.py
+
+# Columnar copy of the roster for match runs: an int8 answer matrix, int8
+# constraint columns, the hashed self-description vectors as CSR arrays and an
+# id map. The SQLite backend writes them as .npy files that every worker
+# memory-maps read-only. Each copy is tagged with the roster
+# version (the change-log token), so any write makes it stale and the next match
+# run rebuilds it once for everyone. Each cohort has its own copy and version.
+
+import json
+import logging
+import os
+import threading
+import uuid
+from itertools import chain
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from .storage import RosterSnapshot, STUDENT_EXPORT_COLUMNS
+from .text_features import (
+    TEXT_DIMENSIONS, build_csr, unpack, inverse_document_frequency, tfidf_weights, pair_cosines
+)
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Questionnaire answers, in answer-matrix column order
+ANSWER_COLUMNS = [
+    'q1_sleep', 'q2_tidy', 'q3_noise', 'q4_friends_freq', 'q5_friday_pref',
+    'q6_overnight_guests', 'q7_conflict_style', 'q8_alone_time',
+    'q9_sports_games', 'q10_movies_music'
+]
+
+# Answers are on a 1..ANSWER_LEVELS scale
+ANSWER_LEVELS = 5
+
+# Hard constraints, in constraint-matrix column order (gender is stored as a code into `genders`)
+CONSTRAINT_COLUMNS = ['gender', 'prefers_ac', 'room_capacity']
+
+_MANIFEST = "manifest.json"
+
+# Bumped when the on-disk layout changes, so older copies are rebuilt instead of mapped
+_FORMAT = 2
+
+# CSR arrays of the text vectors: row offsets, hashed term ids, 1 + log(tf) weights
+_TEXT_ARRAYS = ('text_indptr', 'text_terms', 'text_weights')
+
+# Subdirectory for a snapshot spanning every cohort (cohort names can't start with "_")
+_ALL_COHORTS = "_all"
+
+
+class RosterFeatures:
+    """Answer matrix, constraint columns, text vectors and id map for one roster version (rows are newest first)"""
+
+    def __init__(self, version: int, student_ids: List[str], names: List[str],
+                 answers: "np.ndarray", constraints: "np.ndarray", genders: List[str],
+                 cohort: Optional[str] = None, text: Optional[Tuple["np.ndarray", ...]] = None):
+        self.version = version
+        self.cohort = cohort
+        self.student_ids = student_ids
+        self.names = names
+        self.answers = answers          # (n, len(ANSWER_COLUMNS)) int8
+        self.constraints = constraints  # (n, len(CONSTRAINT_COLUMNS)) int8
+        self.genders = genders
+        if text is None:
+            text = build_csr([None] * len(student_ids))
+        self.text_indptr, self.text_terms, self.text_weights = text
+        self._positions: Optional[Dict[str, int]] = None
+        self._text_values: Optional["np.ndarray"] = None
+        self._text_idf: Optional["np.ndarray"] = None
+        self._summary: Optional[Dict] = None
+
+    def __len__(self) -> int:
+        return len(self.student_ids)
+
+    @property
+    def gender_codes(self) -> "np.ndarray":
+        return self.constraints[:, 0]
+
+    @property
+    def prefers_ac(self) -> "np.ndarray":
+        return self.constraints[:, 1]
+
+    @property
+    def room_capacity(self) -> "np.ndarray":
+        return self.constraints[:, 2]
+
+    def position(self, student_id: str) -> Optional[int]:
+        """Row of a student in the matrices, or None"""
+        if self._positions is None:
+            self._positions = {sid: i for i, sid in enumerate(self.student_ids)}
+        return self._positions.get(student_id)
+
+    def text_idf(self) -> "np.ndarray":
+        """IDF of every hashed term over this roster, computed once"""
+        if self._text_idf is None:
+            self._text_idf = inverse_document_frequency(self.text_indptr, self.text_terms)
+        return self._text_idf
+
+    def text_values(self) -> "np.ndarray":
+        """TF-IDF weights of the text vectors (IDF over this roster, rows L2-normalised), computed once"""
+        if self._text_values is None:
+            self._text_values = tfidf_weights(self.text_indptr, self.text_terms, self.text_weights, self.text_idf())
+        return self._text_values
+
+    def text_row(self, position: int) -> Tuple["np.ndarray", "np.ndarray"]:
+        """(term ids, TF-IDF weights) of one row"""
+        start, end = self.text_indptr[position], self.text_indptr[position + 1]
+        return self.text_terms[start:end], self.text_values()[start:end]
+
+    def weigh_text(self, vector: Optional[bytes]) -> Tuple["np.ndarray", "np.ndarray"]:
+        """(term ids, TF-IDF weights) of a packed vector from outside the roster, with this roster's IDF"""
+        import numpy as np
+        terms, weights = unpack(vector)
+        return terms, tfidf_weights(np.array([0, len(terms)]), terms, weights, self.text_idf())
+
+    def text_cosines(self, left: "np.ndarray", right: "np.ndarray") -> "np.ndarray":
+        """Self-description cosine for each (left[k], right[k]) pair of rows (0.0 if either has no terms)"""
+        return pair_cosines(self.text_indptr, self.text_terms, self.text_values(), left, right)
+
+    def answer_summary(self) -> Dict:
+        """
+        Answer histograms (count of each answer level per question), overall and broken down
+        by gender, AC preference and room capacity. Computed once per roster version.
+        """
+        if self._summary is None:
+            import numpy as np
+            capacities, capacity_codes = np.unique(np.asarray(self.room_capacity), return_inverse=True)
+            self._summary = {
+                "students": len(self),
+                "overall": self._histograms(np.zeros(len(self), dtype=np.int64), ["all"])["all"],
+                "by_gender": self._histograms(np.asarray(self.gender_codes), self.genders),
+                "by_ac": self._histograms(np.asarray(self.prefers_ac), ["non_ac", "ac"]),
+                "by_capacity": self._histograms(capacity_codes.reshape(-1), [str(c) for c in capacities.tolist()])
+            }
+        return self._summary
+
+    def _histograms(self, codes: "np.ndarray", labels: List[str]) -> Dict[str, Dict]:
+        """Per-label histograms for rows grouped by codes (indexes into labels), from one bincount"""
+        import numpy as np
+        codes = codes.astype(np.int64)
+        questions = len(ANSWER_COLUMNS)
+        cells = (codes[:, None] * questions + np.arange(questions)) * ANSWER_LEVELS + (self.answers.astype(np.int64) - 1)
+        counts = np.bincount(cells.ravel(), minlength=len(labels) * questions * ANSWER_LEVELS)
+        counts = counts.reshape(len(labels), questions, ANSWER_LEVELS).tolist()
+        sizes = np.bincount(codes, minlength=len(labels)).tolist()
+        return {
+            label: {"students": sizes[code], "answers": dict(zip(ANSWER_COLUMNS, counts[code]))}
+            for code, label in enumerate(labels)
+        }
+
+    @classmethod
+    def from_rows(cls, version: int, rows: Iterable[Tuple], cohort: Optional[str] = None,
+                  text_vectors: Optional[Iterable[Optional[bytes]]] = None) -> "RosterFeatures":
+        """Build in memory from tuples in STUDENT_EXPORT_COLUMNS order and their stored text vectors"""
+        import numpy as np
+        id_index = STUDENT_EXPORT_COLUMNS.index('student_id')
+        name_index = STUDENT_EXPORT_COLUMNS.index('name')
+        answer_indexes = [STUDENT_EXPORT_COLUMNS.index(c) for c in ANSWER_COLUMNS]
+        constraint_indexes = [STUDENT_EXPORT_COLUMNS.index(c) for c in CONSTRAINT_COLUMNS]
+
+        student_ids, names, answers, constraints = [], [], [], []
+        gender_codes: Dict[str, int] = {}
+        for row in rows:
+            student_ids.append(row[id_index])
+            names.append(row[name_index])
+            answers.append([row[i] for i in answer_indexes])
+            gender, prefers_ac, room_capacity = (row[i] for i in constraint_indexes)
+            code = gender_codes.setdefault(gender, len(gender_codes))
+            constraints.append((code, int(prefers_ac), room_capacity))
+
+        return cls(
+            version, student_ids, names,
+            np.array(answers, dtype=np.int8).reshape(-1, len(ANSWER_COLUMNS)),
+            np.array(constraints, dtype=np.int8).reshape(-1, len(CONSTRAINT_COLUMNS)),
+            list(gender_codes),
+            cohort,
+            build_csr(text_vectors) if text_vectors is not None else None
+        )
+
+
+class FeatureStore:
+    """
+    Hands out RosterFeatures for a snapshot, rebuilding them when the roster has changed.
+    With a directory the features are persisted and memory-mapped (shared by all
+    workers through the page cache); without one they are only kept in process.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._lock = threading.Lock()
+        # Per-cohort locks, so rebuilding one cohort doesn't hold up match runs of another
+        self._cohort_locks: Dict[Optional[str], threading.Lock] = {}
+        self._current: Dict[Optional[str], RosterFeatures] = {}
+        self.rebuilds = 0
+
+    def load(self, snapshot: RosterSnapshot) -> RosterFeatures:
+        """Features for the snapshot's cohort and version, mapped from disk when already built"""
+        cohort = snapshot.cohort
+        with self._lock:
+            cohort_lock = self._cohort_locks.setdefault(cohort, threading.Lock())
+        with cohort_lock:
+            current = self._current.get(cohort)
+            if current is not None and current.version == snapshot.version:
+                return current
+
+            directory = self._cohort_directory(cohort)
+            features = self._map(directory, snapshot.version, cohort) if directory else None
+            if features is None:
+                features = RosterFeatures.from_rows(
+                    snapshot.version, chain.from_iterable(snapshot.iter_student_batches()), cohort,
+                    chain.from_iterable(snapshot.iter_text_vectors())
+                )
+                if not len(features):
+                    # Empty rosters (any cohort name can be asked for) are cheap to rebuild and never
+                    # worth a file, a cache slot or a lock: keep no trace of them
+                    with self._lock:
+                        if cohort not in self._current:
+                            self._cohort_locks.pop(cohort, None)
+                    return features
+                self.rebuilds += 1
+                logger.info("Rebuilt roster features", extra={
+                    "cohort": cohort, "version": features.version, "students": len(features)
+                })
+                if directory:
+                    self._write(directory, features)
+
+            # A snapshot older than what we hold shouldn't evict the newer copy
+            if current is None or features.version > current.version:
+                self._current[cohort] = features
+            return features
+
+    def stats(self) -> Dict:
+        current = dict(self._current)
+        return {
+            "cohorts": {
+                cohort if cohort is not None else _ALL_COHORTS: {"version": f.version, "students": len(f)}
+                for cohort, f in current.items()
+            },
+            "rebuilds": self.rebuilds,
+            "memory_mapped": self.directory is not None
+        }
+
+    def _cohort_directory(self, cohort: Optional[str]) -> Optional[str]:
+        if self.directory is None:
+            return None
+        return os.path.join(self.directory, cohort if cohort is not None else _ALL_COHORTS)
+
+    def _read_manifest(self, directory: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(directory, _MANIFEST)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _map(self, directory: str, version: int, cohort: Optional[str]) -> Optional[RosterFeatures]:
+        """Memory-map the on-disk features if they are for this version"""
+        import numpy as np
+        manifest = self._read_manifest(directory)
+        if manifest is None or manifest["version"] != version or manifest.get("format") != _FORMAT:
+            return None
+        prefix = os.path.join(directory, manifest["prefix"])
+        try:
+            with open(f"{prefix}.ids.json") as f:
+                id_map = json.load(f)
+            if manifest["students"]:
+                answers = np.load(f"{prefix}.answers.npy", mmap_mode="r")
+                constraints = np.load(f"{prefix}.constraints.npy", mmap_mode="r")
+            else:
+                answers = np.zeros((0, len(ANSWER_COLUMNS)), dtype=np.int8)
+                constraints = np.zeros((0, len(CONSTRAINT_COLUMNS)), dtype=np.int8)
+            # A roster without any description terms has empty term arrays, which mmap can't map
+            text = tuple(
+                np.load(f"{prefix}.{name}.npy", mmap_mode="r" if manifest["text_terms"] else None)
+                for name in _TEXT_ARRAYS
+            )
+        except (FileNotFoundError, ValueError):
+            # Files were replaced by a newer version between reading the manifest and opening them
+            return None
+        return RosterFeatures(version, id_map["student_ids"], id_map["names"], answers, constraints,
+                              manifest["genders"], cohort, text)
+
+    def _write(self, directory: str, features: RosterFeatures):
+        """Persist features and point the manifest at them, unless a newer version is already there"""
+        import numpy as np
+        os.makedirs(directory, exist_ok=True)
+        manifest = self._read_manifest(directory)
+        if manifest is not None and manifest["version"] >= features.version and manifest.get("format") == _FORMAT:
+            return
+
+        prefix = f"v{features.version}-{uuid.uuid4().hex[:8]}"
+        base = os.path.join(directory, prefix)
+        # mmap can't map empty files, so an empty roster only gets a manifest and id map
+        if len(features):
+            np.save(f"{base}.answers.npy", features.answers)
+            np.save(f"{base}.constraints.npy", features.constraints)
+        # Always written (empty ones are loaded without mmap)
+        for name in _TEXT_ARRAYS:
+            np.save(f"{base}.{name}.npy", getattr(features, name))
+        with open(f"{base}.ids.json", "w") as f:
+            json.dump({"student_ids": features.student_ids, "names": features.names}, f)
+
+        tmp_path = os.path.join(directory, f".{prefix}.{_MANIFEST}")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "format": _FORMAT,
+                "version": features.version,
+                "prefix": prefix,
+                "students": len(features),
+                "answer_columns": ANSWER_COLUMNS,
+                "constraint_columns": CONSTRAINT_COLUMNS,
+                "genders": features.genders,
+                "text_dimensions": TEXT_DIMENSIONS,
+                "text_terms": len(features.text_terms)
+            }, f)
+        os.replace(tmp_path, os.path.join(directory, _MANIFEST))
+        self._remove_older_than(directory, features.version)
+
+    def _remove_older_than(self, directory: str, version: int):
+        """Delete files of superseded versions (workers still mapping them keep their pages)"""
+        for filename in os.listdir(directory):
+            file_version = filename.split("-", 1)[0]
+            if not (file_version.startswith("v") and file_version[1:].isdigit()):
+                continue
+            if int(file_version[1:]) < version:
+                try:
+                    os.remove(os.path.join(directory, filename))
+                except OSError:
+                    pass
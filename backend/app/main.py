@@ -1,16 +1,53 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any
-from pydantic import BaseModel
-import uvicorn
-from datetime import datetime
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse, FileResponse
+from typing import List, Dict, Any, Iterator, Optional, Union
+from pydantic import BaseModel, TypeAdapter
+from datetime import datetime, timezone
 import sqlite3
 import json
+import os
+import time
+import uuid
+import random
+import secrets
+import threading
+import logging
 
 
-from .models import Student, StudentCreate, MatchResult
-from .matching import MatchingService
+from .models import (
+    Student, StudentCreate, MatchResult, StudentChanges, ImportReport, MatchRun, GroupResult, GroupRun,
+    WhatIfRequest, WhatIfReport, PlacementRequest, PlacementReport, Placement, ArchiveRequest, AnswerSummary, DEFAULT_COHORT, COHORT_PATTERN
+)
+from .matching import MatchingService, DOMAINS
+from .features import FeatureStore
 from .database import Database
+from .memory_store import InMemoryDatabase
+from .storage import StudentStore
+from .responses import FastJSONResponse
+from .metrics import (
+    REGISTRY, HTTP_REQUESTS, HTTP_LATENCY, CACHE_LOOKUPS, LOG_RECORDS_DROPPED,
+    MATCH_RUNS_IN_FLIGHT, MATCH_RUNS_REJECTED
+)
+from .logging_config import setup_logging, shutdown_logging, request_id_var, dropped_log_records
+from .concurrency import SingleFlight, AdmissionLimiter, TooBusyError
+from .profiling import profile_call, load_profile_path
+from .roster_io import export_csv, export_ndjson, import_roster
+from .swaps import Assignment
+from .placement import PlacementIndex
+
+def configure_logging():
+    """JSON logs through a background writer; level and debug sampling come from the environment"""
+    setup_logging(
+        level=os.environ.get("SMARTROOMIE_LOG_LEVEL", "INFO"),
+        debug_sample_rate=float(os.environ.get("SMARTROOMIE_LOG_DEBUG_SAMPLE", "0.01"))
+    )
+
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Smart Roomie API", version="1.0.0")
 
@@ -23,24 +60,112 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large bodies (rosters, match lists, exports); set to 0 to disable
+GZIP_MIN_BYTES = int(os.environ.get("SMARTROOMIE_GZIP_MIN_BYTES", "16384"))
+if GZIP_MIN_BYTES > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES)
+
+
+def create_store() -> StudentStore:
+    """Pick the storage backend from SMARTROOMIE_STORAGE (sqlite or memory)"""
+    backend = os.environ.get("SMARTROOMIE_STORAGE", "sqlite").lower()
+    if backend == "memory":
+        return InMemoryDatabase()
+    if backend != "sqlite":
+        raise ValueError(f"Unknown SMARTROOMIE_STORAGE backend: {backend}")
+    return Database(
+        db_path=os.environ.get("SMARTROOMIE_DB_PATH", "smartroomie.db"),
+        cache_size=int(os.environ.get("SMARTROOMIE_CACHE_SIZE", "1024")),
+        cache_ttl=float(os.environ.get("SMARTROOMIE_CACHE_TTL", "300")),
+        cache_sync_interval=float(os.environ.get("SMARTROOMIE_CACHE_SYNC_INTERVAL", "0.1"))
+    )
+
+
+def create_feature_store() -> FeatureStore:
+    """Memory-mapped answer matrix next to the SQLite file (SMARTROOMIE_FEATURE_DIR), in-process for memory storage"""
+    if isinstance(db, InMemoryDatabase):
+        return FeatureStore()
+    return FeatureStore(os.environ.get("SMARTROOMIE_FEATURE_DIR", f"{db.db_path}.features"))
+
+
+db = create_store()
+matching_service = MatchingService(db, create_feature_store())
+
+# Shared secret for admin-only options (X-Admin-Token header); unset disables them
+ADMIN_TOKEN = os.environ.get("SMARTROOMIE_ADMIN_TOKEN")
+
+# Match runs: coalesce duplicate clicks, and reject (429) beyond this many concurrent runs
+match_flights = SingleFlight()
+match_limiter = AdmissionLimiter(int(os.environ.get("SMARTROOMIE_MAX_MATCH_RUNS", "2")))
+
+# Late-registrant placement: one index per cohort, following the run it last stored
+placement_indexes: Dict[str, PlacementIndex] = {}
+placement_lock = threading.Lock()
+# Held while an index is built, so concurrent first calls share one index (and its lock)
+placement_build_lock = threading.Lock()
+
+@app.middleware("http")
+async def assign_request_id(request: Request, call_next):
+    """Tag every log record of a request with an ID (honours an incoming X-Request-ID)"""
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex[:16]
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        request_id_var.reset(token)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests and record latency per route template (not per raw path)"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        HTTP_LATENCY.labels(method=request.method, route=route_path).observe(time.perf_counter() - start)
+        HTTP_REQUESTS.labels(method=request.method, route=route_path, status=status).inc()
+
+def require_admin(request: Request):
+    """Reject the request unless it carries the admin token"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin features are disabled (SMARTROOMIE_ADMIN_TOKEN is not set)")
+    if not secrets.compare_digest(request.headers.get("x-admin-token", ""), ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match already names this ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [tag.strip() for tag in header.split(",")]
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 response for a conditional GET"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
 
-db = Database()
-matching_service = MatchingService(db)
+def with_etag(response: Response, etag: str) -> Response:
+    """Attach a strong ETag; no-cache makes browsers revalidate instead of reusing blindly"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup"""
+    configure_logging()
     db.init_db()
-    print(" Database initialized successfully")
-    print(" Smart Roomie API is running")
-    print(" Available endpoints:")
-    print("   - POST /api/students - Create student")
-    print("   - GET /api/students - Get all students")
-    print("   - GET /api/students/{id} - Get specific student")
-    print("   - DELETE /api/students/{id} - Delete student")
-    print("   - POST /api/matches - Generate all matches")
-    print("   - GET /api/matches/{id} - Get matches for student")
-    print("   - GET /api/stats - Get statistics")
+    logger.info("Smart Roomie API is running", extra={"storage": type(db).__name__})
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered log records"""
+    shutdown_logging()
 
 @app.get("/")
 async def root():
@@ -60,55 +185,356 @@ async def root():
 async def create_student(student: StudentCreate):
     """Create a new student profile"""
     try:
-        print(f" Creating student: {student.name} (ID: {student.student_id})")
         student_id = db.create_student(student)
-        print(f" Successfully created student: {student.name}")
+        logger.debug("Created student", extra={"student_id": student_id})
         return {
             "message": "Student created successfully", 
             "student_id": student_id,
             "name": student.name
         }
     except ValueError as e:
-        print(f" Validation error: {str(e)}")
+        logger.info("Rejected student", extra={"student_id": student.student_id, "reason": str(e)})
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f" Unexpected error: {str(e)}")
+        logger.exception("Unexpected error creating student")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+def cohort_etag(kind: str, cohort: Optional[str], version: int) -> str:
+    """ETag for a roster-derived response, scoped to a cohort when one was asked for"""
+    scope = f"{kind}-{cohort}" if cohort is not None else kind
+    return f'"{scope}-v{version}"'
+
 @app.get("/api/students", response_model=List[Student])
-async def get_all_students():
-    """Get all student profiles"""
+async def get_all_students(request: Request, cohort: Optional[str] = Query(None, pattern=COHORT_PATTERN)):
+    """Get all student profiles (of one cohort, if given)"""
+    try:
+        # Read the version before the rows so the ETag never claims newer data than we send
+        etag = cohort_etag("students", cohort, db.get_version(cohort))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        students = db.get_all_students(cohort)
+        logger.debug("Retrieved students", extra={"count": len(students)})
+        return with_etag(FastJSONResponse(students), etag)
+    except Exception as e:
+        logger.exception("Error retrieving students")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/students/changes", response_model=StudentChanges)
+async def get_student_changes(since: int = 0, cohort: Optional[str] = Query(None, pattern=COHORT_PATTERN)):
+    """Get students inserted, updated or deleted since a change token (in one cohort, if given)"""
+    try:
+        return FastJSONResponse(StudentChanges(**db.get_changes_since(since, cohort)))
+    except Exception as e:
+        logger.exception("Error retrieving student changes")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/students/export")
+async def export_students(format: str = Query("csv", pattern="^(csv|ndjson)$")):
+    """Stream the whole roster as CSV or NDJSON"""
+    if format == "ndjson":
+        return StreamingResponse(
+            export_ndjson(db),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": "attachment; filename=students.ndjson"}
+        )
+    return StreamingResponse(
+        export_csv(db),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=students.csv"}
+    )
+
+@app.post("/api/students/import", response_model=ImportReport)
+def import_students(file: UploadFile = File(...), format: str = Query(None, pattern="^(csv|ndjson)$")):
+    """Bulk-import students from an uploaded CSV or NDJSON file"""
+    # Sync endpoint on purpose: parsing and inserting run in the threadpool
+    if format is None:
+        filename = (file.filename or "").lower()
+        format = "ndjson" if filename.endswith((".ndjson", ".jsonl")) else "csv"
     try:
-        students = db.get_all_students()
-        print(f" Retrieved {len(students)} students")
-        return students
+        report = import_roster(db, file.file, format)
+        logger.info("Imported students", extra={"inserted": report["inserted"], "failed": report["failed"]})
+        return report
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"File must be UTF-8 encoded: {e}")
     except Exception as e:
-        print(f" Error retrieving students: {str(e)}")
+        logger.exception("Error importing students")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/students/{student_id}", response_model=Student)
-async def get_student(student_id: str):
+async def get_student(student_id: str, request: Request):
     """Get a specific student profile"""
     try:
+        etag = f'"student-{student_id}-v{db.get_student_version(student_id)}"'
+        # Existence first: an unknown id must be a 404 even if the client sends its ETag
         student = db.get_student(student_id)
         if not student:
             raise HTTPException(status_code=404, detail="Student not found")
-        return student
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return with_etag(FastJSONResponse(student), etag)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Output formats of a match run: the original one-MatchResult-per-group list, or GroupRun
+RUN_FORMAT_PATTERN = r'^(matches|groups)$'
+
+_group_list_adapter = TypeAdapter(List[GroupResult])
+
+def run_and_store_matches(cohort: str, timings: Optional[Dict[str, float]] = None) -> tuple:
+    """Compute a cohort's match run and store it (blocking - called from the threadpool)"""
+    # One read transaction for the whole run: registrations keep committing meanwhile,
+    # and the stored run records exactly which roster version (and seed) it used
+    seed = random.randrange(2 ** 31)
+    with db.read_snapshot(cohort) as snapshot:
+        groups = matching_service.calculate_groups(snapshot=snapshot, seed=seed, timings=timings)
+        roster = matching_service.features.load(snapshot)
+    run_id = db.save_match_run(groups, roster.version, seed, cohort)
+    logger.info("Stored match run", extra={
+        "run_id": run_id, "cohort": cohort, "matches": len(groups), "roster_version": roster.version
+    })
+    return run_id, roster, groups
+
+def stored_run_body(run: Dict, result_format: str, explain: bool) -> bytes:
+    """
+    Encode a stored run (as returned by get_match_run) in the requested format. Groups
+    without explanations are spliced in still encoded; anything else decodes them and
+    may load the roster for names (blocking - call from the threadpool)
+    """
+    groups_json = run.pop("groups_json")
+    if result_format == "groups" and not explain:
+        return FastJSONResponse({**run, "domains": DOMAINS}).body[:-1] + b',"groups":' + groups_json + b'}'
+    groups = _group_list_adapter.validate_json(groups_json)
+    if result_format == "groups":
+        return FastJSONResponse(GroupRun(**run, domains=DOMAINS, groups=matching_service.explain_groups(groups))).body
+    with db.read_snapshot(run["cohort"]) as snapshot:
+        roster = matching_service.features.load(snapshot)
+    matches = matching_service.to_match_results(groups, roster, run["created_at"])
+    run.pop("group_count")
+    return FastJSONResponse(MatchRun(**run, match_count=len(matches), matches=matches)).body
+
+def run_profiled_matches(cohort: str, top_n: int, result_format: str, explain: bool) -> Dict[str, Any]:
+    """Match run under cProfile, with the service's phase timers alongside the hotspots"""
+    timings: Dict[str, float] = {}
+    (run_id, roster, groups), profile = profile_call(lambda: run_and_store_matches(cohort, timings), top_n=top_n)
+    profile["phases_ms"] = {phase: round(seconds * 1000, 3) for phase, seconds in timings.items()}
+    logger.info("Profiled match run", extra={"run_id": run_id, "profile_id": profile["profile_id"]})
+    if result_format == "groups":
+        return {"run_id": run_id, "groups": matching_service.explain_groups(groups) if explain else groups,
+                "profile": profile}
+    return {"run_id": run_id, "matches": matching_service.to_match_results(groups, roster), "profile": profile}
+
+@app.post("/api/matches", response_model=Union[List[MatchResult], GroupRun])
+async def calculate_matches(request: Request, cohort: str = Query(DEFAULT_COHORT, pattern=COHORT_PATTERN),
+                            result_format: str = Query("matches", alias="format", pattern=RUN_FORMAT_PATTERN),
+                            explain: bool = False,
+                            profile: bool = False, profile_top: int = Query(25, ge=1, le=200)):
+    """
+    Calculate roommate matches for all students of a cohort.
+    ?format=groups returns the stored run as a GroupRun (explanations only with ?explain=1)
+    instead of the list of MatchResults.
+    Admins can pass ?profile=1 (or X-Profile: 1) to run it under the profiler;
+    the response then becomes {run_id, matches (or groups), profile}.
+    """
+    profile = profile or request.headers.get("x-profile") == "1"
+    if profile:
+        require_admin(request)
+    if cohort != DEFAULT_COHORT and cohort not in db.list_cohorts():
+        # Don't store runs for cohorts without any students
+        raise HTTPException(status_code=404, detail="Cohort not found")
+    try:
+        if profile:
+            # Profiled runs are never coalesced - the caller wants their own measurement
+            result = await match_limiter.run(
+                lambda: run_in_threadpool(run_profiled_matches, cohort, profile_top, result_format, explain)
+            )
+            response = FastJSONResponse(result)
+            response.headers["X-Match-Run-Id"] = str(result["run_id"])
+            return response
+
+        # Concurrent requests for the same cohort share one computation; other cohorts
+        # run in parallel, up to the admission limit
+        (run_id, roster, groups), shared = await match_flights.run(
+            cohort, lambda: match_limiter.run(lambda: run_in_threadpool(run_and_store_matches, cohort))
+        )
+        if result_format == "groups":
+            # Same body as GET /api/match-runs/{run_id}?format=groups
+            body = await run_in_threadpool(stored_run_body, db.get_match_run(run_id), result_format, explain)
+            response = Response(content=body, media_type="application/json")
+        else:
+            response = FastJSONResponse(
+                await run_in_threadpool(matching_service.to_match_results, groups, roster)
+            )
+        response.headers["X-Match-Run-Id"] = str(run_id)
+        if shared:
+            response.headers["X-Match-Coalesced"] = "true"
+        return response
+    except TooBusyError as e:
+        logger.warning("Rejected match run, too many in flight", extra={"retry_after": e.retry_after})
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except Exception as e:
+        logger.exception("Error generating matches")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def download_profile(profile_id: str, request: Request):
+    """Download a saved profile (.prof, readable with pstats or snakeviz)"""
+    require_admin(request)
+    path = load_profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"match-run-{profile_id}.prof")
+
+async def match_run_response(request: Request, run_id: int, result_format: str, explain: bool) -> Response:
+    """Serve a stored match run, or 304 if the client already has it"""
+    run = None
+    if result_format == "groups":
+        # Stored groups never change
+        etag = f'"match-run-{run_id}-groups{"-explained" if explain else ""}"'
+    else:
+        # Names are looked up in the run's cohort when rendering, so this format follows its version
+        run = db.get_match_run(run_id)
+        if not run:
+            raise HTTPException(status_code=404, detail="Match run not found")
+        etag = f'"match-run-{run_id}-matches-v{db.get_version(run["cohort"])}"'
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    run = run or db.get_match_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Match run not found")
+    if result_format == "groups" and not explain:
+        body = stored_run_body(run, result_format, explain)
+    else:
+        body = await run_in_threadpool(stored_run_body, run, result_format, explain)
+    return with_etag(Response(content=body, media_type="application/json"), etag)
+
+@app.get("/api/match-runs/latest", response_model=Union[MatchRun, GroupRun])
+async def get_latest_match_run(request: Request, cohort: Optional[str] = Query(None, pattern=COHORT_PATTERN),
+                               result_format: str = Query("matches", alias="format", pattern=RUN_FORMAT_PATTERN),
+                               explain: bool = False):
+    """Get the most recent stored match run (of one cohort, if given) as matches or, with ?format=groups, groups"""
+    run_id = db.get_latest_match_run_id(cohort)
+    if run_id is None:
+        raise HTTPException(status_code=404, detail="No match runs yet")
+    return await match_run_response(request, run_id, result_format, explain)
+
+@app.get("/api/match-runs/{run_id}", response_model=Union[MatchRun, GroupRun])
+async def get_match_run(run_id: int, request: Request,
+                        result_format: str = Query("matches", alias="format", pattern=RUN_FORMAT_PATTERN),
+                        explain: bool = False):
+    """Get a stored match run as matches or, with ?format=groups, groups"""
+    return await match_run_response(request, run_id, result_format, explain)
+
+@app.post("/api/match-runs/{run_id}/what-if", response_model=WhatIfReport)
+def evaluate_what_if(run_id: int, body: WhatIfRequest):
+    """
+    Score proposed swaps/moves against a stored match run. With commit, the accepted
+    proposals are applied and the result is stored as a new run.
+    """
+    # Sync endpoint on purpose: scoring runs in the threadpool
+    run = db.get_match_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Match run not found")
+    try:
+        with db.read_snapshot(run["cohort"]) as snapshot:
+            roster = matching_service.features.load(snapshot)
+        try:
+            assignment = Assignment.from_run(matching_service, roster, run["groups_json"])
+        except ValueError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        results = assignment.evaluate(body.proposals, body.commit, body.only_improving)
+
+        committed_run_id = None
+        if any(result.committed for result in results):
+            committed_run_id = db.save_match_run(assignment.to_groups(), roster.version, None, run["cohort"])
+            logger.info("Stored edited match run", extra={
+                "run_id": committed_run_id, "base_run_id": run_id,
+                "applied": sum(result.committed for result in results)
+            })
+        return FastJSONResponse(WhatIfReport(run_id=run_id, results=results, committed_run_id=committed_run_id))
     except HTTPException:
         raise
     except Exception as e:
+        logger.exception("Error evaluating what-if proposals")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/matches", response_model=List[MatchResult])
-async def calculate_matches():
-    """Calculate roommate matches for all students"""
+def cached_placement_index(run_id: int) -> Optional[PlacementIndex]:
+    """The index following `run_id`, also when it has since stored a newer run"""
+    with placement_lock:
+        for index in placement_indexes.values():
+            if index.run_id == run_id or run_id in index.superseded:
+                return index
+    return None
+
+def placement_index(run_id: int) -> PlacementIndex:
+    """Cached placement index of a stored run, built on first use (blocking)"""
+    index = cached_placement_index(run_id)
+    if index is not None:
+        return index
+    with placement_build_lock:
+        # Another request may have built it while we waited
+        index = cached_placement_index(run_id)
+        if index is None:
+            index = build_placement_index(run_id)
+    return index
+
+def build_placement_index(run_id: int) -> PlacementIndex:
+    run = db.get_match_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Match run not found")
+    with db.read_snapshot(run["cohort"]) as snapshot:
+        roster = matching_service.features.load(snapshot)
+    groups = _group_list_adapter.validate_json(run["groups_json"])
+    # Students changed since the run's roster weren't left out by it, they came later
+    late_ids = [s.student_id for s in db.get_changes_since(run["roster_version"], run["cohort"])["students"]]
+    try:
+        index = PlacementIndex(matching_service, roster, groups, run_id, run["cohort"],
+                               run["roster_version"], late_ids)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    with placement_lock:
+        placement_indexes[run["cohort"]] = index
+    return index
+
+@app.post("/api/match-runs/{run_id}/place", response_model=PlacementReport)
+def place_students(run_id: int, body: PlacementRequest):
+    """
+    Place students who registered after a match run into its open room slots (or pair
+    them with students it left out), and store the result as a new run.
+    """
+    # Sync endpoint on purpose: placement runs in the threadpool
     try:
-        print(" Generating roommate matches...")
-        matches = matching_service.calculate_all_matches()
-        print(f" Generated {len(matches)} matches")
-        return matches
+        index = placement_index(run_id)
+        with index.lock:
+            if index.run_id != run_id:
+                raise HTTPException(status_code=409, detail=f"Match run {run_id} was just superseded by run "
+                                                            f"{index.run_id}; place into that run instead")
+            results = []
+            for student_id in body.student_ids:
+                student = db.get_student(student_id)
+                if student is None:
+                    results.append(Placement(student_id=student_id, error="Student not found"))
+                else:
+                    results.append(index.place(student))
+
+            placed_run_id = None
+            if index.changed:
+                groups = index.to_groups()
+                groups_changed = len(index.changed)
+                placed_run_id = db.save_match_run(groups, index.roster_version, None, index.cohort)
+                if not index.saved(placed_run_id, groups):
+                    with placement_lock:
+                        placement_indexes.pop(index.cohort, None)
+                logger.info("Stored match run with late registrants", extra={
+                    "run_id": placed_run_id, "base_run_id": run_id,
+                    "groups_changed": groups_changed
+                })
+        return FastJSONResponse(PlacementReport(run_id=run_id, results=results, placed_run_id=placed_run_id))
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f" Error generating matches: {str(e)}")
+        logger.exception("Error placing late registrants")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/matches/{student_id}", response_model=List[MatchResult])
@@ -120,7 +546,7 @@ async def get_student_matches(student_id: str):
             raise HTTPException(status_code=404, detail="Student not found")
         
         matches = matching_service.get_matches_for_student(student_id)
-        return matches
+        return FastJSONResponse(matches)
     except HTTPException:
         raise
     except Exception as e:
@@ -134,61 +560,140 @@ async def delete_student(student_id: str):
         if not success:
             raise HTTPException(status_code=404, detail="Student not found")
         
-        print(f" Deleted student: {student_id}")
+        logger.info("Deleted student", extra={"student_id": student_id})
         return {"message": "Student deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
-        print(f" Error deleting student: {str(e)}")
+        logger.exception("Error deleting student")
         raise HTTPException(status_code=500, detail=str(e))
 
+def stream_archive(cohort: Optional[str], created_before: Optional[datetime],
+                   batch_size: int, vacuum: bool) -> Iterator[str]:
+    """Run an archive and report it as NDJSON events: progress per batch, optimized, then done (or error)"""
+    start = time.perf_counter()
+    archived = 0
+    try:
+        for progress in db.archive_students(cohort, created_before, batch_size):
+            archived = progress["archived"]
+            yield json.dumps({"event": "progress", **progress}) + "\n"
+        optimized = db.optimize_storage(vacuum)
+        yield json.dumps({"event": "optimized", **optimized}) + "\n"
+    except Exception as e:
+        # The 200 is already sent, so failures can only be reported in the stream
+        logger.exception("Error archiving students")
+        yield json.dumps({"event": "error", "archived": archived, "detail": str(e)}) + "\n"
+        return
+    elapsed = time.perf_counter() - start
+    logger.info("Archived students", extra={"cohort": cohort, "archived": archived, "seconds": round(elapsed, 3)})
+    yield json.dumps({"event": "done", "archived": archived, "seconds": round(elapsed, 3)}) + "\n"
+
+@app.post("/api/admin/archive")
+async def archive_students(body: ArchiveRequest, request: Request):
+    """
+    End-of-term cleanup (admin only): move a cohort, or everyone created before a time,
+    into the archive table in batches, then ANALYZE (and VACUUM if asked).
+    Progress is streamed as NDJSON while it runs.
+    """
+    require_admin(request)
+    if body.cohort is None and body.created_before is None:
+        raise HTTPException(status_code=400, detail="Give a cohort, a created_before time, or both")
+    created_before = body.created_before
+    if created_before is not None and created_before.tzinfo is not None:
+        created_before = created_before.astimezone(timezone.utc).replace(tzinfo=None)
+    return StreamingResponse(
+        stream_archive(body.cohort, created_before, body.batch_size, body.vacuum),
+        media_type="application/x-ndjson",
+        # Keeps GZipMiddleware from holding progress lines back in its buffer
+        headers={"Content-Encoding": "identity"}
+    )
+
 @app.get("/api/stats")
-async def get_stats():
-    """Get application statistics"""
+async def get_stats(request: Request, cohort: Optional[str] = Query(None, pattern=COHORT_PATTERN)):
+    """Get application statistics (for one cohort, if given)"""
     try:
-        students = db.get_all_students()
-        total_students = len(students)
-        
-        # Calculate additional stats
-        male_count = len([s for s in students if s.gender == 'Male'])
-        female_count = len([s for s in students if s.gender == 'Female'])
-        other_count = len([s for s in students if s.gender == 'Other'])
-        ac_preference = len([s for s in students if s.prefers_ac])
-        non_ac_preference = total_students - ac_preference
-        
-        return {
-            "total_students": total_students,
-            "male_students": male_count,
-            "female_students": female_count,
-            "other_students": other_count,
-            "ac_preference": ac_preference,
-            "non_ac_preference": non_ac_preference,
-            "last_updated": datetime.now().isoformat()
-        }
+        etag = cohort_etag("stats", cohort, db.get_version(cohort))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        # Nothing time-dependent in the body: the ETag promises identical bytes per version
+        return with_etag(FastJSONResponse(db.get_stats(cohort)), etag)
+    except Exception as e:
+        logger.exception("Error getting stats")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/admin/summary", response_model=AnswerSummary)
+def get_answer_summary(request: Request, cohort: Optional[str] = Query(None, pattern=COHORT_PATTERN)):
+    """
+    Answer histograms for q1-q10 by gender, AC and capacity (for one cohort, if given).
+    Aggregates only, so it is as open as /api/stats. Computed over the roster features
+    and kept until the roster changes.
+    """
+    # Sync endpoint on purpose: a changed roster rebuilds its features in the threadpool
+    try:
+        etag = cohort_etag("summary", cohort, db.get_version(cohort))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        with db.read_snapshot(cohort) as snapshot:
+            roster = matching_service.features.load(snapshot)
+        summary = {"cohort": cohort, "roster_version": roster.version, **roster.answer_summary()}
+        # The snapshot may be newer than the version the ETag was computed from
+        return with_etag(FastJSONResponse(summary), cohort_etag("summary", cohort, roster.version))
+    except Exception as e:
+        logger.exception("Error building answer summary")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/cohorts", response_model=Dict[str, int])
+async def list_cohorts():
+    """Student count per cohort"""
+    try:
+        return db.list_cohorts()
     except Exception as e:
-        print(f" Error getting stats: {str(e)}")
+        logger.exception("Error listing cohorts")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Get hit/miss metrics for the in-process caches"""
+    return {**db.cache_stats(), "features": matching_service.features.stats()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus text-format metrics"""
+    LOG_RECORDS_DROPPED.set_total(dropped_log_records())
+    MATCH_RUNS_IN_FLIGHT.set(match_limiter.running)
+    MATCH_RUNS_REJECTED.set_total(match_limiter.rejected)
+    for cache_name, stats in db.cache_stats().items():
+        CACHE_LOOKUPS.labels(cache=cache_name, result="hit").set_total(stats["hits"])
+        CACHE_LOOKUPS.labels(cache=cache_name, result="miss").set_total(stats["misses"])
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Health check endpoint
 @app.get("/health")
-async def health_check():
-    """Health check endpoint"""
+async def health_check(deep: bool = False):
+    """Health check endpoint - cheap by default, ?deep=true also checks data integrity"""
     try:
-        # Test database connection
-        students = db.get_all_students()
-        return {
+        db.ping()
+        result = {
             "status": "healthy",
             "database": "connected",
-            "total_students": len(students),
             "timestamp": datetime.now().isoformat()
         }
+        if deep:
+            integrity = db.integrity_check()
+            result["total_students"] = db.get_stats()["total_students"]
+            result["integrity"] = integrity
+            if integrity != "ok":
+                result["status"] = "unhealthy"
+                return JSONResponse(status_code=503, content=result)
+        return result
     except Exception as e:
-        return {
+        return JSONResponse(status_code=503, content={
             "status": "unhealthy",
             "error": str(e),
             "timestamp": datetime.now().isoformat()
-        }
+        })
 
 if __name__ == "__main__":
-    print(" Starting Smart Roomie API...")
+    logger.info("Starting Smart Roomie API")
+    import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8000, log_level="info")
\ No newline at end of file
@@ -1,23 +1,80 @@
 # backend/app/matching.py
 
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Dict, Tuple
+from typing import TYPE_CHECKING, List, Dict, Sequence, Tuple, Optional
 from datetime import datetime
-from .models import Student, MatchResult
-from .database import Database
+from .models import Student, MatchResult, GroupResult, DEFAULT_COHORT
+from .storage import StudentStore, RosterSnapshot
+from .features import FeatureStore, RosterFeatures, ANSWER_COLUMNS
+from .metrics import MATCH_PHASE_LATENCY, ROSTER_SIZE, BUCKET_SIZE, MATCH_GROUPS
+import math
 import random
+import logging
+import time
+from contextlib import contextmanager
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Columns of each compatibility domain in the answer matrix (ANSWER_COLUMNS order)
+DOMAIN_SLICES = {
+    'habits': slice(0, 3),
+    'social': slice(3, 6),
+    'conflict': slice(6, 8),
+    'interests': slice(8, 10)
+}
+
+# Every compatibility domain: the answer-matrix ones plus self-description text similarity
+DOMAINS = list(DOMAIN_SLICES) + ['text']
+
+# Key counting the pairs where both students wrote a description (only those have a text score)
+TEXT_PAIRS = 'text_pairs'
+
+# Explanation codes of a group and the sentence each renders to ({size}: group size)
+EXPLANATIONS = {
+    'excellent': "Excellent compatibility for {size}-member group",
+    'good': "Good compatibility with minor differences in {size}-member group",
+    'moderate': "Moderate compatibility in {size}-member group",
+    'low': "Lower compatibility in {size}-member group - may require adjustment",
+    'habits_similar': "Very similar living habits across the group",
+    'habits_different': "Different living habits may require compromise",
+    'social_compatible': "Compatible social preferences",
+    'social_varied': "Varied social preferences in the group",
+    'conflict_different': "Different conflict resolution styles - good communication important",
+    'text_similar': "Similar interests in their self-descriptions"
+}
+
+
+# NumPy is imported on first use rather than at module import, so a new API worker
+# can start serving before the scientific stack is loaded.
+def cosine_similarity(vector1: "np.ndarray", vector2: "np.ndarray") -> float:
+    """Cosine similarity of two 1-D vectors (0.0 when either is all zeros)"""
+    import numpy as np
+    norm = np.linalg.norm(vector1) * np.linalg.norm(vector2)
+    if norm == 0:
+        return 0.0
+    return float(np.dot(vector1, vector2) / norm)
+
+
+def _cohort_label(cohort: Optional[str]) -> str:
+    """Metric label for a roster's cohort ("_all" for a snapshot spanning every cohort)"""
+    return cohort if cohort is not None else "_all"
+
 
 class MatchingService:
-    def __init__(self, database: Database):
+    def __init__(self, database: StudentStore, features: Optional[FeatureStore] = None):
         self.db = database
+        # Columnar answers for full match runs (in-process only unless a directory-backed store is given)
+        self.features = features if features is not None else FeatureStore()
         
         # Weights for different compatibility domains
         self.weights = {
-            'habits': 0.5,
-            'social': 0.25,
-            'conflict': 0.2,
-            'interests': 0.05
+            'habits': 0.45,
+            'social': 0.225,
+            'conflict': 0.18,
+            'interests': 0.045,
+            'text': 0.1  # self-description similarity
         }
         
         # Penalty thresholds for deal-breaker model
@@ -40,15 +97,17 @@ class MatchingService:
                 continue
             
             # Hard constraints that must match
-            if (student.prefers_ac == target_student.prefers_ac and
+            if (student.cohort == target_student.cohort and
+                student.prefers_ac == target_student.prefers_ac and
                 student.room_capacity == target_student.room_capacity and
                 student.gender == target_student.gender):
                 potential_matches.append(student)
         
         return potential_matches
 
-    def vectorize_student(self, student: Student) -> Dict[str, np.ndarray]:
+    def vectorize_student(self, student: Student) -> Dict[str, "np.ndarray"]:
         """Convert student questionnaire responses to domain vectors"""
+        import numpy as np
         return {
             'habits': np.array([student.q1_sleep, student.q2_tidy, student.q3_noise]),
             'social': np.array([student.q4_friends_freq, student.q5_friday_pref, student.q6_overnight_guests]),
@@ -56,59 +115,99 @@ class MatchingService:
             'interests': np.array([student.q9_sports_games, student.q10_movies_music])
         }
 
-    def calculate_similarity(self, vector1: np.ndarray, vector2: np.ndarray) -> float:
+    def calculate_similarity(self, vector1: "np.ndarray", vector2: "np.ndarray", rng=random) -> float:
         """Calculate cosine similarity between two vectors with added variability"""
-        # Reshape vectors for sklearn
-        v1 = vector1.reshape(1, -1)
-        v2 = vector2.reshape(1, -1)
-        
-        # Calculate cosine similarity
-        similarity = cosine_similarity(v1, v2)[0][0]
-        
+        return self.adjust_similarity(cosine_similarity(vector1, vector2), rng)
+
+    def adjust_similarity(self, similarity: float, rng=random) -> float:
+        """Map a cosine similarity into the 0-1 score range, with added variability"""
         # Convert to 0-1 range (cosine similarity returns -1 to 1)
         normalized_similarity = (similarity + 1) / 2
         
         # Add random variation to create more diverse scores (±5%)
-        variation = random.uniform(-0.05, 0.05)
+        variation = rng.uniform(-0.05, 0.05)
         adjusted_similarity = normalized_similarity + variation
         
         return max(0.0, min(1.0, adjusted_similarity))
 
-    def calculate_group_compatibility_score(self, students: List[Student]) -> Tuple[float, Dict[str, float]]:
+    def calculate_group_compatibility_score(self, students: List[Student], roster: RosterFeatures,
+                                            rng=random) -> Tuple[float, Dict[str, float]]:
         """
         Calculate compatibility score for a group of students (2, 3, or 4 members)
-        Returns average compatibility across all pairs in the group
+        Returns average compatibility across all pairs in the group. Text similarity
+        comes from the students' stored vectors in `roster`, as in full match runs.
+        """
+        import numpy as np
+        answers = np.array([[getattr(s, column) for column in ANSWER_COLUMNS] for s in students], dtype=np.float64)
+        positions = [roster.position(s.student_id) for s in students]
+        text_cosines = self.group_text_cosines(roster, [positions])[0] if None not in positions else None
+        return self.score_answer_rows(answers, rng, text_cosines)
+
+    def score_answer_rows(self, answers: "np.ndarray", rng=random,
+                          text_cosines: Optional["np.ndarray"] = None) -> Tuple[float, Dict[str, float]]:
+        """
+        Group compatibility from a (members x ANSWER_COLUMNS) answer matrix and the
+        members' (members x members) self-description cosines (NaN for pairs where
+        someone has no description; no text score at all when not given)
         """
-        if len(students) < 2:
-            return 0.0, {'habits': 0.0, 'social': 0.0, 'conflict': 0.0, 'interests': 0.0}
+        if len(answers) < 2:
+            return 0.0, dict.fromkeys(DOMAINS, 0.0)
         
         # Calculate pairwise similarities for all combinations
-        all_similarities = {'habits': [], 'social': [], 'conflict': [], 'interests': []}
-        total_pairs = 0
-        
-        for i in range(len(students)):
-            for j in range(i + 1, len(students)):
-                student1 = students[i]
-                student2 = students[j]
-                
-                # Vectorize both students
-                vectors1 = self.vectorize_student(student1)
-                vectors2 = self.vectorize_student(student2)
-                
+        all_similarities = {domain: [] for domain in DOMAINS}
+        pairs = 0
+        
+        for i in range(len(answers)):
+            for j in range(i + 1, len(answers)):
+                pairs += 1
                 # Calculate similarity for each domain
-                for domain in self.weights.keys():
-                    similarity = self.calculate_similarity(vectors1[domain], vectors2[domain])
+                for domain, columns in DOMAIN_SLICES.items():
+                    similarity = self.calculate_similarity(answers[i, columns], answers[j, columns], rng)
                     all_similarities[domain].append(similarity)
-                
-                total_pairs += 1
+                # TF-IDF cosines are already 0-1 and need no variation
+                if text_cosines is not None and not math.isnan(text_cosines[i, j]):
+                    all_similarities['text'].append(float(text_cosines[i, j]))
         
-        # Calculate average similarities across all pairs
+        # Calculate average similarities across all pairs (text: across the pairs that have it)
         avg_similarities = {}
         for domain in all_similarities:
-            avg_similarities[domain] = np.mean(all_similarities[domain]) if all_similarities[domain] else 0.0
+            values = all_similarities[domain]
+            avg_similarities[domain] = sum(values) / len(values) if values else 0.0
+        if not all_similarities['text']:
+            avg_similarities['text'] = None
+        
+        text_coverage = len(all_similarities['text']) / pairs
+        return self.combine_similarities(avg_similarities, len(answers), text_coverage), avg_similarities
+
+    def pair_similarities(self, answers1: "np.ndarray", answers2: "np.ndarray",
+                          text_cosine: Optional[float] = None) -> Dict[str, float]:
+        """
+        Per-domain similarity (0-1) of two students' answer rows and text cosine, without
+        the random variation. TEXT_PAIRS is 1.0 when the pair has a text cosine (both
+        wrote a description), else 0.0 with 'text' 0.0, so the values can be summed.
+        """
+        similarities = {domain: max(0.0, min(1.0, (cosine_similarity(answers1[columns], answers2[columns]) + 1) / 2))
+                        for domain, columns in DOMAIN_SLICES.items()}
+        similarities['text'] = text_cosine if text_cosine is not None else 0.0
+        similarities[TEXT_PAIRS] = 1.0 if text_cosine is not None else 0.0
+        return similarities
+
+    def combine_similarities(self, avg_similarities: Dict[str, Optional[float]], group_size: int,
+                             text_coverage: float = 1.0) -> float:
+        """
+        Group score from its average per-domain similarities: weights, deal-breaker and size
+        penalties. The text weight only counts for the share of pairs that have a text score
+        (`text_coverage`); the other weights are rescaled to make up the rest.
+        """
+        if avg_similarities.get('text') is None:
+            text_coverage = 0.0
+        text_weight = self.weights['text'] * text_coverage
+        answer_scale = (1.0 - text_weight) / (1.0 - self.weights['text'])
         
         # Calculate base weighted score
-        base_score = sum(avg_similarities[domain] * self.weights[domain] for domain in self.weights.keys())
+        base_score = sum(avg_similarities[domain] * self.weights[domain] for domain in DOMAIN_SLICES) * answer_scale
+        if text_weight:
+            base_score += avg_similarities['text'] * text_weight
         
         # Apply penalty model
         final_score = base_score
@@ -122,60 +221,75 @@ class MatchingService:
             final_score *= self.penalty_factors['conflict']
         
         # Add group size penalty for larger groups (makes larger groups slightly harder to match)
-        group_size_penalty = 1.0 - (len(students) - 2) * 0.05  # Small penalty for 3+ people
+        group_size_penalty = 1.0 - (group_size - 2) * 0.05  # Small penalty for 3+ people
         final_score *= group_size_penalty
         
         # Ensure score is between 0 and 1
-        final_score = max(0.0, min(1.0, final_score))
-        
-        return final_score, avg_similarities
+        return max(0.0, min(1.0, final_score))
 
-    def create_match_explanation(self, score: float, similarities: Dict[str, float], students: List[Student]) -> str:
-        """Generate a human-readable explanation for the group match"""
-        explanations = []
-        
+    def explanation_codes(self, score: float, similarities: Dict[str, float]) -> List[str]:
+        """Codes (keys of EXPLANATIONS) describing a group: an overall tier, then domain-specific insights"""
         # Overall compatibility
         if score >= 0.8:
-            explanations.append(f"Excellent compatibility for {len(students)}-member group")
+            codes = ['excellent']
         elif score >= 0.6:
-            explanations.append(f"Good compatibility with minor differences in {len(students)}-member group")
+            codes = ['good']
         elif score >= 0.4:
-            explanations.append(f"Moderate compatibility in {len(students)}-member group")
+            codes = ['moderate']
         else:
-            explanations.append(f"Lower compatibility in {len(students)}-member group - may require adjustment")
+            codes = ['low']
         
         # Domain-specific insights
         if similarities['habits'] >= 0.8:
-            explanations.append("Very similar living habits across the group")
+            codes.append('habits_similar')
         elif similarities['habits'] < 0.4:
-            explanations.append("Different living habits may require compromise")
+            codes.append('habits_different')
         
         if similarities['social'] >= 0.8:
-            explanations.append("Compatible social preferences")
+            codes.append('social_compatible')
         elif similarities['social'] < 0.4:
-            explanations.append("Varied social preferences in the group")
+            codes.append('social_varied')
         
         if similarities['conflict'] < 0.4:
-            explanations.append("Different conflict resolution styles - good communication important")
+            codes.append('conflict_different')
         
-        return "; ".join(explanations)
+        if (similarities.get('text') or 0.0) >= 0.75:
+            codes.append('text_similar')
+        return codes
+
+    def render_explanation(self, codes: Sequence[str], group_size: int) -> str:
+        """Human-readable explanation from explanation codes"""
+        return "; ".join(EXPLANATIONS[code].format(size=group_size) for code in codes)
 
-    def generate_room_groups(self, students: List[Student]) -> List[List[Student]]:
-        """Generate groups based on room capacity"""
+    def create_match_explanation(self, score: float, similarities: Dict[str, float], students: Sequence) -> str:
+        """Generate a human-readable explanation for the group match"""
+        return self.render_explanation(self.explanation_codes(score, similarities), len(students))
+
+    def generate_room_groups(self, roster: RosterFeatures, rng=random) -> List[List[int]]:
+        """
+        Generate groups (lists of roster rows) of the students' room capacity. Students
+        are only grouped with others of the same gender and AC preference, the same hard
+        constraints filter_potential_matches applies.
+        """
         groups = []
-        students_by_capacity = {}
-        
-        # Group students by room capacity
-        for student in students:
-            capacity = student.room_capacity
-            if capacity not in students_by_capacity:
-                students_by_capacity[capacity] = []
-            students_by_capacity[capacity].append(student)
-        
-        # Generate groups for each capacity
-        for capacity, student_list in students_by_capacity.items():
+        students_by_bucket: Dict[Tuple[int, bool, int], List[int]] = {}
+        
+        # Group students by gender, AC preference and room capacity
+        buckets = zip(roster.gender_codes.tolist(), roster.prefers_ac.tolist(), roster.room_capacity.tolist())
+        for position, bucket in enumerate(buckets):
+            students_by_bucket.setdefault(bucket, []).append(position)
+        
+        # Concurrent runs of other cohorts keep their own series
+        cohort = _cohort_label(roster.cohort)
+        BUCKET_SIZE.clear(cohort=cohort)
+        for (gender, prefers_ac, capacity), student_list in students_by_bucket.items():
+            label = f"{roster.genders[gender]}/{'ac' if prefers_ac else 'non-ac'}/{capacity}-sharing"
+            BUCKET_SIZE.labels(cohort=cohort, bucket=label).set(len(student_list))
+        
+        # Generate groups for each bucket
+        for (_, _, capacity), student_list in students_by_bucket.items():
             # Shuffle to avoid always pairing the same students
-            random.shuffle(student_list)
+            rng.shuffle(student_list)
             
             # Create groups of the specified capacity
             for i in range(0, len(student_list), capacity):
@@ -185,72 +299,196 @@ class MatchingService:
         
         return groups
 
-    def calculate_all_matches(self) -> List[MatchResult]:
-        """Calculate room groups for all students (for admin dashboard)"""
-        print("🔄 Starting group match calculation...")
-        all_students = self.db.get_all_students()
-        print(f"📊 Found {len(all_students)} students")
-        
-        if len(all_students) < 2:
-            print("❌ Need at least 2 students to generate matches")
+    def group_text_cosines(self, roster: RosterFeatures, groups: List[List[int]]) -> List["np.ndarray"]:
+        """
+        (size x size) self-description cosines of every group. All within-group pairs of
+        one capacity bucket are scored by a single sparse product over the roster's
+        stored TF-IDF vectors, so no text is processed per pair.
+        """
+        import numpy as np
+        groups_by_capacity: Dict[int, List[int]] = {}
+        for index, group in enumerate(groups):
+            groups_by_capacity.setdefault(int(roster.room_capacity[group[0]]), []).append(index)
+
+        described = np.diff(roster.text_indptr) > 0
+        cosines = [np.zeros((len(group), len(group))) for group in groups]
+        for indexes in groups_by_capacity.values():
+            owners, left, right, rows_left, rows_right = [], [], [], [], []
+            for index in indexes:
+                group = groups[index]
+                for i in range(len(group)):
+                    for j in range(i + 1, len(group)):
+                        owners.append(index)
+                        left.append(i)
+                        right.append(j)
+                        rows_left.append(group[i])
+                        rows_right.append(group[j])
+            rows_left = np.array(rows_left, dtype=np.int64)
+            rows_right = np.array(rows_right, dtype=np.int64)
+            bucket_cosines = roster.text_cosines(rows_left, rows_right).astype(np.float64)
+            bucket_cosines[~(described[rows_left] & described[rows_right])] = np.nan
+            for index, i, j, cosine in zip(owners, left, right, bucket_cosines.tolist()):
+                cosines[index][i, j] = cosines[index][j, i] = cosine
+        return cosines
+
+    @contextmanager
+    def _phase(self, name: str, timings: Optional[Dict[str, float]]):
+        """Time one phase of a match run into the metrics histogram (and `timings`, if given)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            MATCH_PHASE_LATENCY.labels(phase=name).observe(elapsed)
+            if timings is not None:
+                timings[name] = elapsed
+
+    def calculate_groups(self, snapshot: Optional[RosterSnapshot] = None,
+                         seed: Optional[int] = None,
+                         timings: Optional[Dict[str, float]] = None,
+                         cohort: str = DEFAULT_COHORT) -> List[GroupResult]:
+        """
+        Calculate room groups for all students of one cohort (for admin dashboard).
+        Reads the roster from `snapshot` when given (its cohort wins over `cohort`);
+        passing the same seed on the same roster reproduces the run.
+        Per-phase durations are written into `timings`.
+        """
+        logger.info("Starting group match calculation", extra={"cohort": snapshot.cohort if snapshot else cohort})
+        rng = random.Random(seed) if seed is not None else random
+        with self._phase("load", timings):
+            if snapshot is not None:
+                roster = self.features.load(snapshot)
+            else:
+                with self.db.read_snapshot(cohort) as snapshot:
+                    roster = self.features.load(snapshot)
+        logger.info("Loaded roster for matching", extra={"students": len(roster), "version": roster.version})
+        ROSTER_SIZE.labels(cohort=_cohort_label(roster.cohort)).set(len(roster))
+        
+        if len(roster) < 2:
+            logger.warning("Need at least 2 students to generate matches")
             return []
         
         # Generate room groups
-        room_groups = self.generate_room_groups(all_students)
-        print(f"🏠 Generated {len(room_groups)} room groups")
-        
-        all_matches = []
-        
-        for group_index, group in enumerate(room_groups):
-            if len(group) < 2:
-                continue
-                
-            # Calculate group compatibility
-            score, similarities = self.calculate_group_compatibility_score(group)
-            explanation = self.create_match_explanation(score, similarities, group)
-            
-            # Create match result for the group
-            # For display purposes, we'll show it as pairs but include all group members
-            student_names = " + ".join([s.name for s in group])
-            student_ids = " + ".join([s.student_id for s in group])
+        with self._phase("grouping", timings):
+            room_groups = self.generate_room_groups(roster, rng)
+        logger.info("Generated room groups", extra={"groups": len(room_groups)})
+        
+        import numpy as np
+        all_groups = []
+        
+        with self._phase("text", timings):
+            text_cosines = self.group_text_cosines(roster, room_groups)
+        
+        with self._phase("scoring", timings):
+            for group_index, group in enumerate(room_groups):
+                if len(group) < 2:
+                    continue
+                    
+                # Calculate group compatibility (gathers only this group's rows from the mapped matrix)
+                score, similarities = self.score_answer_rows(
+                    roster.answers[group].astype(np.float64), rng, text_cosines[group_index]
+                )
+                all_groups.append(GroupResult(
+                    member_ids=[roster.student_ids[i] for i in group],
+                    score=score,
+                    domain_scores=[similarities[domain] for domain in DOMAINS],
+                    explanation_codes=self.explanation_codes(score, similarities)
+                ))
+        
+        with self._phase("sorting", timings):
+            # Sort by compatibility score (descending) and add some randomization to lower scores
+            all_groups.sort(key=lambda x: x.score, reverse=True)
             
-            match_result = MatchResult(
-                student1_id=group[0].student_id,
-                student2_id=group[1].student_id if len(group) > 1 else group[0].student_id,
-                student1_name=student_names,  # Show all names together
-                student2_name=f"{len(group)}-sharing group",  # Indicate group size
-                compatibility_score=score,
-                habits_similarity=similarities['habits'],
-                social_similarity=similarities['social'],
-                conflict_similarity=similarities['conflict'],
-                interests_similarity=similarities['interests'],
+            # Add more variation to scores to create diverse compatibility ranges
+            for i, group in enumerate(all_groups):
+                if i > len(all_groups) * 0.3:  # After top 30%, add more variation
+                    # Reduce score for lower matches to create 60-95% range instead of 95-100%
+                    variation_factor = rng.uniform(0.6, 0.95)
+                    group.score = max(0.4, min(1.0, group.score * variation_factor))
+        
+        MATCH_GROUPS.observe(len(all_groups))
+        logger.info("Generated group matches", extra={"matches": len(all_groups)})
+        return all_groups
+
+    def calculate_all_matches(self, snapshot: Optional[RosterSnapshot] = None,
+                              seed: Optional[int] = None,
+                              timings: Optional[Dict[str, float]] = None,
+                              cohort: str = DEFAULT_COHORT) -> List[MatchResult]:
+        """calculate_groups in the original one-MatchResult-per-group format"""
+        if snapshot is None:
+            with self.db.read_snapshot(cohort) as snapshot:
+                return self.calculate_all_matches(snapshot, seed, timings)
+        groups = self.calculate_groups(snapshot, seed, timings)
+        return self.to_match_results(groups, self.features.load(snapshot))
+
+    def to_match_results(self, groups: List[GroupResult], roster: RosterFeatures,
+                         created_at: Optional[datetime] = None) -> List[MatchResult]:
+        """
+        Groups as MatchResults: names joined into student1_name, the group size in
+        student2_name and the explanation rendered (names come from `roster`;
+        students no longer in it show their id). Incomplete legacy groups keep their stored names.
+        """
+        created_at = created_at or datetime.now()
+        matches = []
+        for group in groups:
+            members = group.member_ids
+            scores = dict(zip(DOMAINS, group.domain_scores))
+            explanation = group.explanation
+            if explanation is None and group.explanation_codes:
+                explanation = self.render_explanation(group.explanation_codes, len(members))
+            if group.legacy_names is not None:
+                # Incomplete group of a legacy run: shown as it was stored
+                student1_name, student2_name = group.legacy_names
+            else:
+                names = []
+                for student_id in members:
+                    position = roster.position(student_id)
+                    names.append(roster.names[position] if position is not None else student_id)
+                student1_name = " + ".join(names)  # Show all names together
+                student2_name = f"{len(members)}-sharing group"  # Indicate group size
+            matches.append(MatchResult(
+                student1_id=members[0],
+                student2_id=members[1] if len(members) > 1 else members[0],
+                student1_name=student1_name,
+                student2_name=student2_name,
+                member_ids=members if group.legacy_names is None else [],
+                compatibility_score=group.score,
+                habits_similarity=scores['habits'],
+                social_similarity=scores['social'],
+                conflict_similarity=scores['conflict'],
+                interests_similarity=scores['interests'],
+                # Runs stored before cosines were clamped can hold a float32 hair above 1
+                text_similarity=min(1.0, scores['text']) if scores.get('text') is not None else None,
                 constraints_matched=True,
                 match_explanation=explanation,
-                created_at=datetime.now()
-            )
-            all_matches.append(match_result)
-        
-        # Sort by compatibility score (descending) and add some randomization to lower scores
-        all_matches.sort(key=lambda x: x.compatibility_score, reverse=True)
-        
-        # Add more variation to scores to create diverse compatibility ranges
-        for i, match in enumerate(all_matches):
-            if i > len(all_matches) * 0.3:  # After top 30%, add more variation
-                # Reduce score for lower matches to create 60-95% range instead of 95-100%
-                variation_factor = random.uniform(0.6, 0.95)
-                match.compatibility_score *= variation_factor
-                match.compatibility_score = max(0.4, min(1.0, match.compatibility_score))
-        
-        print(f"✅ Generated {len(all_matches)} group matches")
-        return all_matches
+                created_at=created_at
+            ))
+        return matches
+
+    def explain_groups(self, groups: List[GroupResult]) -> List[GroupResult]:
+        """Copies of the groups with their explanation rendered (kept when they already have one)"""
+        return [
+            group if group.explanation is not None else group.model_copy(update={
+                "explanation": self.render_explanation(group.explanation_codes, len(group.member_ids))
+            })
+            for group in groups
+        ]
 
     def get_matches_for_student(self, student_id: str, limit: int = 10) -> List[MatchResult]:
         """Get room group matches for a specific student"""
-        target_student = self.db.get_student(student_id)
-        if not target_student:
+        # Cohorts never mix, so only the target's cohort needs reading
+        student = self.db.get_student(student_id)
+        if not student:
             return []
         
-        all_students = self.db.get_all_students()
+        # Read the student and the roster from the same snapshot so they agree
+        with self.db.read_snapshot(student.cohort) as snapshot:
+            target_student = snapshot.get_student(student_id)
+            if not target_student:
+                return []
+            
+            all_students = snapshot.get_all_students()
+            roster = self.features.load(snapshot)
         potential_matches = self.filter_potential_matches(target_student, all_students)
         
         # Add target student to create a group
@@ -268,7 +506,7 @@ class MatchingService:
         
         match_results = []
         for group in groups[:limit]:
-            score, similarities = self.calculate_group_compatibility_score(group)
+            score, similarities = self.calculate_group_compatibility_score(group, roster)
             explanation = self.create_match_explanation(score, similarities, group)
             
             student_names = " + ".join([s.name for s in group])
@@ -278,11 +516,13 @@ class MatchingService:
                 student2_id=group[1].student_id if len(group) > 1 else target_student.student_id,
                 student1_name=student_names,
                 student2_name=f"{len(group)}-sharing group",
+                member_ids=[s.student_id for s in group],
                 compatibility_score=score,
                 habits_similarity=similarities['habits'],
                 social_similarity=similarities['social'],
                 conflict_similarity=similarities['conflict'],
                 interests_similarity=similarities['interests'],
+                text_similarity=similarities['text'],
                 constraints_matched=True,
                 match_explanation=explanation,
                 created_at=datetime.now()
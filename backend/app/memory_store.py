@@ -0,0 +1,328 @@
+# backend/app/memory_store.py
+
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+
+from .models import Student, StudentCreate, GroupResult, DEFAULT_COHORT
+from .storage import StudentStore, RosterSnapshot, STUDENT_INSERT_COLUMNS
+from .text_features import hash_text
+
+
+logger = logging.getLogger(__name__)
+
+_group_list_adapter = TypeAdapter(List[GroupResult])
+
+
+def _utcnow() -> datetime:
+    """Naive UTC timestamp, matching SQLite's CURRENT_TIMESTAMP"""
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def _format_timestamp(value: datetime) -> str:
+    """Format like SQLite's CURRENT_TIMESTAMP text"""
+    return value.isoformat(sep=' ')
+
+
+def _export_row(student: Student) -> Tuple:
+    """A student as a tuple in STUDENT_EXPORT_COLUMNS order"""
+    return (tuple(getattr(student, column) for column in STUDENT_INSERT_COLUMNS)
+            + (_format_timestamp(student.created_at), _format_timestamp(student.updated_at)))
+
+
+class _MemorySnapshot(RosterSnapshot):
+    """Copy of the roster taken under the store lock"""
+
+    def __init__(self, students: List[Student], text_vectors: List[Optional[bytes]],
+                 version: int, cohort: Optional[str]):
+        self._students = students  # newest first
+        self._text_vectors = text_vectors  # aligned with students
+        self._index = {s.student_id: s for s in students}
+        self.version = version
+        self.cohort = cohort
+
+    def get_student(self, student_id: str) -> Optional[Student]:
+        return self._index.get(student_id)
+
+    def get_all_students(self) -> List[Student]:
+        return list(self._students)
+
+    def iter_student_batches(self, batch_size: int = 1000) -> Iterator[List[Tuple]]:
+        for start in range(0, len(self._students), batch_size):
+            yield [_export_row(s) for s in self._students[start:start + batch_size]]
+
+    def iter_text_vectors(self, batch_size: int = 1000) -> Iterator[List[Optional[bytes]]]:
+        for start in range(0, len(self._text_vectors), batch_size):
+            yield self._text_vectors[start:start + batch_size]
+
+
+class InMemoryDatabase(StudentStore):
+    """
+    Student store kept entirely in process memory - no file I/O.
+    Meant for load tests, matching benchmarks and tests; data is lost on restart.
+
+    Students live in an insertion-ordered array of slots with a dict index
+    from student_id to slot; deleted slots are tombstoned and compacted lazily.
+    Each cohort keeps an insertion-ordered set of its student_ids so cohort
+    reads don't walk the other cohorts.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._slots: List[Optional[Student]] = []
+        self._index: Dict[str, int] = {}
+        self._next_id = 1
+        self._counters: Dict[str, int] = {}
+        self._changes: List[Tuple[int, str, str, str]] = []  # (seq, student_id, operation, cohort)
+        self._student_versions: Dict[str, int] = {}
+        self._text_vectors: Dict[str, Optional[bytes]] = {}
+        self._cohort_members: Dict[str, Dict[str, None]] = {}
+        self._cohort_versions: Dict[str, int] = {}
+        self._match_runs: List[Dict] = []
+        self._archive: List[Tuple[Student, datetime]] = []  # (student, archived_at)
+        self._latest_runs: Dict[str, int] = {}
+
+    def init_db(self):
+        """Nothing to create; kept for interface compatibility"""
+        logger.info("In-memory student store ready")
+
+    def ping(self) -> bool:
+        return True
+
+    def integrity_check(self) -> str:
+        with self._lock:
+            live = sum(1 for s in self._slots if s is not None)
+            if live != len(self._index) or live != self._counters.get('total', 0):
+                return "index/counter mismatch"
+            return "ok"
+
+    def get_stats(self, cohort: Optional[str] = None) -> Dict[str, int]:
+        prefix = f"cohort:{cohort}:" if cohort is not None else ""
+        with self._lock:
+            total = self._counters.get(prefix + 'total', 0)
+            ac_preference = self._counters.get(prefix + 'ac:1', 0)
+            return {
+                "total_students": total,
+                "male_students": self._counters.get(prefix + 'gender:Male', 0),
+                "female_students": self._counters.get(prefix + 'gender:Female', 0),
+                "other_students": self._counters.get(prefix + 'gender:Other', 0),
+                "ac_preference": ac_preference,
+                "non_ac_preference": total - ac_preference
+            }
+
+    def list_cohorts(self) -> Dict[str, int]:
+        with self._lock:
+            return {cohort: len(members) for cohort, members in sorted(self._cohort_members.items()) if members}
+
+    def _count(self, student: Student, delta: int):
+        """Update the stats counters (global and the student's cohort) for a student being added (+1) or removed (-1)"""
+        for prefix in ('', f"cohort:{student.cohort}:"):
+            for key in ('total', f"gender:{student.gender}", f"ac:{int(student.prefers_ac)}"):
+                self._counters[prefix + key] = self._counters.get(prefix + key, 0) + delta
+
+    def _log_change(self, student_id: str, operation: str, cohort: str):
+        seq = self._changes[-1][0] + 1 if self._changes else 1
+        self._changes.append((seq, student_id, operation, cohort))
+        self._student_versions[student_id] = seq
+        self._cohort_versions[cohort] = seq
+
+    def _insert(self, student_data: StudentCreate) -> Student:
+        """Insert a student (caller holds the lock)"""
+        if student_data.student_id in self._index:
+            raise ValueError(f"Student ID {student_data.student_id} already exists")
+        now = _utcnow()
+        student = Student(id=self._next_id, created_at=now, updated_at=now, **student_data.model_dump())
+        self._next_id += 1
+        self._index[student.student_id] = len(self._slots)
+        self._slots.append(student)
+        self._text_vectors[student.student_id] = hash_text(student.self_description)
+        self._cohort_members.setdefault(student.cohort, {})[student.student_id] = None
+        self._count(student, 1)
+        self._log_change(student.student_id, 'insert', student.cohort)
+        return student
+
+    def _compact(self, force: bool = False):
+        """Drop tombstoned slots once they make up more than half the array (or now, with force)"""
+        if not force and (len(self._slots) < 64 or len(self._index) * 2 > len(self._slots)):
+            return
+        self._slots = [s for s in self._slots if s is not None]
+        self._index = {s.student_id: i for i, s in enumerate(self._slots)}
+
+    def create_student(self, student_data: StudentCreate) -> str:
+        with self._lock:
+            return self._insert(student_data).student_id
+
+    def get_student(self, student_id: str) -> Optional[Student]:
+        with self._lock:
+            slot = self._index.get(student_id)
+            return self._slots[slot] if slot is not None else None
+
+    def get_all_students(self, cohort: Optional[str] = None) -> List[Student]:
+        with self._lock:
+            if cohort is None:
+                return [s for s in reversed(self._slots) if s is not None]
+            members = self._cohort_members.get(cohort, {})
+            return [self._slots[self._index[sid]] for sid in reversed(members)]
+
+    def _remove(self, student_id: str) -> Optional[Student]:
+        """Remove a student and log the deletion (caller holds the lock)"""
+        slot = self._index.pop(student_id, None)
+        if slot is None:
+            return None
+        student = self._slots[slot]
+        self._slots[slot] = None
+        del self._text_vectors[student_id]
+        del self._cohort_members[student.cohort][student_id]
+        self._count(student, -1)
+        self._log_change(student_id, 'delete', student.cohort)
+        return student
+
+    def delete_student(self, student_id: str) -> bool:
+        with self._lock:
+            removed = self._remove(student_id) is not None
+            self._compact()
+            return removed
+
+    def update_student_timestamp(self, student_id: str):
+        with self._lock:
+            slot = self._index.get(student_id)
+            if slot is None:
+                return
+            student = self._slots[slot].model_copy(update={'updated_at': _utcnow()})
+            self._slots[slot] = student
+            self._log_change(student_id, 'update', student.cohort)
+
+    def get_changes_since(self, since: int = 0, cohort: Optional[str] = None) -> Dict:
+        with self._lock:
+            token = self.get_version(cohort)
+            if since <= 0 or since > token:
+                return {"token": token, "full": True, "students": self.get_all_students(cohort), "deleted": []}
+
+            # Sequence numbers are dense, so the entries after `since` start at index `since`
+            changed_ids = list(dict.fromkeys(
+                student_id for _, student_id, _, change_cohort in self._changes[since:]
+                if cohort is None or change_cohort == cohort
+            ))
+            # A student re-registered in another cohort counts as deleted from this one
+            students = [self._slots[self._index[sid]] for sid in changed_ids if sid in self._index]
+            students = [s for s in students if cohort is None or s.cohort == cohort]
+            students.sort(key=lambda s: s.created_at, reverse=True)
+            present = {s.student_id for s in students}
+            return {
+                "token": token,
+                "full": False,
+                "students": students,
+                "deleted": [sid for sid in changed_ids if sid not in present]
+            }
+
+    def iter_student_batches(self, batch_size: int = 1000) -> Iterator[List[Tuple]]:
+        with self._lock:
+            students = [s for s in self._slots if s is not None]
+        for start in range(0, len(students), batch_size):
+            yield [_export_row(s) for s in students[start:start + batch_size]]
+
+    def create_students_bulk(self, students: Iterable[Tuple[int, StudentCreate]],
+                             batch_size: int = 500, max_errors: int = 100) -> Dict:
+        inserted = 0
+        failed = 0
+        errors = []
+        for row_number, student_data in students:
+            try:
+                with self._lock:
+                    self._insert(student_data)
+                inserted += 1
+            except ValueError as e:
+                failed += 1
+                if len(errors) < max_errors:
+                    errors.append({"row": row_number, "student_id": student_data.student_id, "error": str(e)})
+        return {"inserted": inserted, "failed": failed, "errors": errors}
+
+    def archive_students(self, cohort: Optional[str] = None, created_before: Optional[datetime] = None,
+                         batch_size: int = 1000) -> Iterator[Dict[str, int]]:
+        if cohort is None and created_before is None:
+            raise ValueError("Archiving needs a cohort or a created_before time")
+
+        def selected(student: Optional[Student]) -> bool:
+            return (student is not None and (cohort is None or student.cohort == cohort)
+                    and (created_before is None or student.created_at < created_before))
+
+        with self._lock:
+            total = sum(1 for s in self._slots if selected(s))
+        archived = 0
+        yield {"archived": archived, "total": total}
+        while True:
+            with self._lock:
+                batch = []
+                for student in self._slots:
+                    if selected(student):
+                        batch.append(student)
+                        if len(batch) >= batch_size:
+                            break
+                if not batch:
+                    break
+                now = _utcnow()
+                for student in batch:
+                    self._remove(student.student_id)
+                    self._archive.append((student, now))
+                self._compact()
+            archived += len(batch)
+            yield {"archived": archived, "total": max(total, archived)}
+
+    def optimize_storage(self, vacuum: bool = False) -> Dict:
+        """No planner statistics to refresh; vacuum drops tombstoned slots right away"""
+        if vacuum:
+            with self._lock:
+                self._compact(force=True)
+        return {"analyzed": False, "vacuumed": vacuum}
+
+    def get_version(self, cohort: Optional[str] = None) -> int:
+        with self._lock:
+            if cohort is not None:
+                return self._cohort_versions.get(cohort, 0)
+            return self._changes[-1][0] if self._changes else 0
+
+    def get_student_version(self, student_id: str) -> int:
+        with self._lock:
+            return self._student_versions.get(student_id, 0)
+
+    @contextmanager
+    def read_snapshot(self, cohort: Optional[str] = None) -> Iterator[RosterSnapshot]:
+        with self._lock:
+            # Students are immutable once stored (updates replace the object), so a shallow copy is enough
+            students = self.get_all_students(cohort)
+            text_vectors = [self._text_vectors[s.student_id] for s in students]
+            snapshot = _MemorySnapshot(students, text_vectors, self.get_version(cohort), cohort)
+        yield snapshot
+
+    def save_match_run(self, groups: List[GroupResult], roster_version: int,
+                       seed: Optional[int] = None, cohort: str = DEFAULT_COHORT) -> int:
+        groups_json = _group_list_adapter.dump_json(groups, exclude_none=True)
+        with self._lock:
+            run_id = len(self._match_runs) + 1
+            self._latest_runs[cohort] = run_id
+            self._match_runs.append({
+                "run_id": run_id,
+                "cohort": cohort,
+                "roster_version": roster_version,
+                "seed": seed,
+                "created_at": _utcnow(),
+                "group_count": len(groups),
+                "groups_json": groups_json
+            })
+            return run_id
+
+    def get_match_run(self, run_id: int) -> Optional[Dict]:
+        with self._lock:
+            if 1 <= run_id <= len(self._match_runs):
+                return dict(self._match_runs[run_id - 1])
+            return None
+
+    def get_latest_match_run_id(self, cohort: Optional[str] = None) -> Optional[int]:
+        with self._lock:
+            if cohort is not None:
+                return self._latest_runs.get(cohort)
+            return len(self._match_runs) or None
@@ -0,0 +1,248 @@
+# backend/app/metrics.py
+
+# Minimal in-process metrics rendered in Prometheus text format by /metrics.
+# No client library or external service needed.
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values, **kwargs):
+        """Get the child series for a set of label values"""
+        if kwargs:
+            values = tuple(str(kwargs[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _default(self):
+        return self.labels()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            lines.extend(child.render(self.name, self.labelnames, values))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def set_total(self, value: float):
+        """Mirror a running total kept elsewhere (it must only ever grow)"""
+        with self._lock:
+            self.value = value
+
+    def render(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def set_total(self, value: float):
+        self._default().set_total(value)
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def render(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(self.value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def clear(self, **match):
+        """Drop all label combinations, or only those with the given label values (e.g. one cohort's buckets)"""
+        with self._lock:
+            if not match:
+                self._children.clear()
+                return
+            positions = [(self.labelnames.index(name), str(value)) for name, value in match.items()]
+            for values in [v for v in self._children if all(v[i] == value for i, value in positions)]:
+                del self._children[values]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Sequence[float]):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the wall-clock duration of a block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def render(self, name, labelnames, values):
+        lines = []
+        cumulative = 0
+        with self._lock:
+            counts = list(self.counts)
+            total = self.sum
+        for bound, count in zip(list(self.buckets) + [float('inf')], counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{name}_bucket{_format_labels(labelnames, values, le)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, values)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, values)} {cumulative}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "smartroomie_http_requests_total", "HTTP requests by route and status", ["method", "route", "status"]))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "smartroomie_http_request_duration_seconds", "HTTP request latency by route", ["method", "route"]))
+DB_QUERY_LATENCY = REGISTRY.register(Histogram(
+    "smartroomie_db_query_duration_seconds", "Database operation latency", ["operation"], buckets=DB_BUCKETS))
+MATCH_PHASE_LATENCY = REGISTRY.register(Histogram(
+    "smartroomie_match_phase_duration_seconds", "calculate_groups latency by phase", ["phase"]))
+ROSTER_SIZE = REGISTRY.register(Gauge(
+    "smartroomie_roster_size", "Students loaded by the cohort's last match run", ["cohort"]))
+BUCKET_SIZE = REGISTRY.register(Gauge(
+    "smartroomie_match_bucket_size",
+    "Students per gender/AC/room-capacity bucket in the cohort's last match run", ["cohort", "bucket"]))
+MATCH_GROUPS = REGISTRY.register(Histogram(
+    "smartroomie_match_groups", "Groups produced per match run", buckets=SIZE_BUCKETS))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "smartroomie_cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"]))
+
+MATCH_RUNS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "smartroomie_match_runs_in_flight", "Match computations currently running"))
+MATCH_RUNS_REJECTED = REGISTRY.register(Counter(
+    "smartroomie_match_runs_rejected_total", "Match runs rejected with 429 by the admission limit"))
+LOG_RECORDS_DROPPED = REGISTRY.register(Counter(
+    "smartroomie_log_records_dropped_total", "Log records dropped because the log queue was full"))
+
+
+def timed_query(operation: Optional[str] = None):
+    """Decorator recording a database method's latency under DB_QUERY_LATENCY"""
+    def decorator(func):
+        child = DB_QUERY_LATENCY.labels(operation=operation or func.__name__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -1,9 +1,13 @@
 # backend/app/models.py
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional, Union
 from datetime import datetime
 
+# Cohort (hostel / intake) students belong to when none is given
+DEFAULT_COHORT = "default"
+COHORT_PATTERN = r'^[A-Za-z0-9][A-Za-z0-9_-]*$'
+
 class StudentCreate(BaseModel):
     """Model for creating a new student - REMOVED OTHER GENDER"""
     name: str = Field(..., min_length=1, max_length=100)
@@ -29,6 +33,9 @@ class StudentCreate(BaseModel):
     # Optional description
     self_description: Optional[str] = Field(None, max_length=500)
 
+    # Partition key: students are only matched within their cohort
+    cohort: str = Field(DEFAULT_COHORT, min_length=1, max_length=50, pattern=COHORT_PATTERN)
+
 class Student(BaseModel):
     """Model for student data from database - REMOVED OTHER GENDER"""
     id: int
@@ -53,6 +60,7 @@ class Student(BaseModel):
     q10_movies_music: int
     
     self_description: Optional[str] = None
+    cohort: str = DEFAULT_COHORT
     created_at: datetime
     updated_at: datetime
 
@@ -62,11 +70,130 @@ class MatchResult(BaseModel):
     student2_id: str
     student1_name: str
     student2_name: str
+    member_ids: List[str] = Field(default_factory=list)  # every student in the group, in display order
     compatibility_score: float = Field(..., ge=0.0, le=1.0)
     habits_similarity: float = Field(..., ge=0.0, le=1.0)
     social_similarity: float = Field(..., ge=0.0, le=1.0)
     conflict_similarity: float = Field(..., ge=0.0, le=1.0)
     interests_similarity: float = Field(..., ge=0.0, le=1.0)
+    text_similarity: Optional[float] = Field(None, ge=0.0, le=1.0)  # self-description domain (None in older runs)
     constraints_matched: bool
     match_explanation: Optional[str] = None
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+class StudentChanges(BaseModel):
+    """Delta of the student roster since a change token"""
+    token: int  # pass back as ?since= on the next poll
+    full: bool  # True when `students` is the whole roster rather than a delta
+    students: List[Student]  # inserted or updated students
+    deleted: List[str]  # student_ids removed since the token
+
+class ImportReport(BaseModel):
+    """Result of a bulk roster import"""
+    inserted: int
+    failed: int
+    errors: List[Dict[str, Union[int, str, None]]]  # first failing rows: row, student_id, error
+    errors_truncated: bool
+
+class GroupResult(BaseModel):
+    """One room group of a match run: ids and scores only, no names or free text"""
+    member_ids: List[str]
+    score: float = Field(..., ge=0.0, le=1.0)
+    domain_scores: List[Optional[float]]  # similarity per domain, in the run's `domains` order (None: not scored)
+    explanation_codes: List[str] = []  # see matching.EXPLANATIONS
+    explanation: Optional[str] = None  # rendered from the codes only when asked for (?explain=1)
+    # Only on groups of runs stored before member_ids was recorded: the run's own (student1_name,
+    # student2_name). member_ids then holds just the first two members, so the group is incomplete.
+    legacy_names: Optional[List[str]] = None
+
+class GroupRun(BaseModel):
+    """A stored match run in the compact group format"""
+    run_id: int
+    cohort: str = DEFAULT_COHORT
+    roster_version: int
+    seed: Optional[int] = None
+    created_at: datetime
+    domains: List[str]  # order of every group's domain_scores
+    group_count: int
+    groups: List[GroupResult]
+
+class MatchRun(BaseModel):
+    """A stored match run, one MatchResult per group (the original format)"""
+    run_id: int
+    cohort: str = DEFAULT_COHORT
+    roster_version: int  # cohort change token of the snapshot the run read
+    seed: Optional[int] = None  # RNG seed, replaying with it on that roster reproduces the run
+    created_at: datetime
+    match_count: int
+    matches: List[MatchResult]
+
+class PlacementRequest(BaseModel):
+    """Students who registered after a match run, to place into it"""
+    student_ids: List[str] = Field(..., min_length=1, max_length=1000)
+
+class Placement(BaseModel):
+    """Where one late registrant ended up"""
+    student_id: str
+    placed: bool = False
+    group: Optional[int] = None  # index of the group in the new run
+    new_group: bool = False  # paired with a student the run had left out
+    score: float = 0.0  # noise-free score of the group after placing
+    error: Optional[str] = None
+
+class PlacementReport(BaseModel):
+    """Placements into a stored match run, and the run they were stored as"""
+    run_id: int
+    results: List[Placement]
+    placed_run_id: Optional[int] = None
+
+class AnswerBreakdown(BaseModel):
+    """Answer histograms of one group of students"""
+    students: int
+    answers: Dict[str, List[int]]  # question -> how many students gave answer 1, 2, ... 5
+
+class AnswerSummary(BaseModel):
+    """Questionnaire answer distribution of a cohort (or every cohort), for dashboard charts"""
+    cohort: Optional[str] = None
+    roster_version: int
+    students: int
+    overall: AnswerBreakdown
+    by_gender: Dict[str, AnswerBreakdown]
+    by_ac: Dict[str, AnswerBreakdown]  # "ac" / "non_ac"
+    by_capacity: Dict[str, AnswerBreakdown]  # room capacity -> histograms
+
+class ArchiveRequest(BaseModel):
+    """Students to move into the archive: a cohort, everyone created before a time, or both"""
+    cohort: Optional[str] = Field(None, pattern=COHORT_PATTERN)
+    created_before: Optional[datetime] = None  # times without a zone are UTC, like created_at
+    batch_size: int = Field(1000, ge=1, le=10000)  # students per transaction
+    vacuum: bool = False  # VACUUM once archived (ANALYZE always runs)
+
+class SwapProposal(BaseModel):
+    """A what-if edit to a stored match run: swap two students, or move one into another group"""
+    action: str = Field(..., pattern=r'^(swap|move)$')
+    student_id: str
+    other_student_id: Optional[str] = None  # swap: the student to trade places with
+    to_group: Optional[int] = Field(None, ge=0)  # move: index of the target group in the run
+
+class WhatIfRequest(BaseModel):
+    """Proposals to evaluate against a stored match run"""
+    proposals: List[SwapProposal] = Field(..., min_length=1, max_length=5000)
+    commit: bool = False  # store a new run with the accepted proposals applied
+    only_improving: bool = True  # when committing, accept only proposals that raise the total score
+
+class ProposalResult(BaseModel):
+    """Score change of one proposal (scores exclude the random variation of full runs)"""
+    index: int
+    valid: bool
+    error: Optional[str] = None
+    groups: List[int] = []  # indexes of the groups the proposal touches
+    score_before: float = 0.0  # summed score of those groups
+    score_after: float = 0.0
+    delta: float = 0.0
+    committed: bool = False
+
+class WhatIfReport(BaseModel):
+    """Evaluation of a batch of proposals, and the run they were committed to if requested"""
+    run_id: int
+    results: List[ProposalResult]
+    committed_run_id: Optional[int] = None
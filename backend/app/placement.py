@@ -0,0 +1,186 @@
+# backend/app/placement.py
+
+# Late-registrant placement into a stored match run. The index keeps, per
+# bucket (gender, AC preference, room capacity - the buckets generate_room_groups
+# splits the roster into), the groups that still have a free slot together with
+# the running sum of their members' answer rows. A newcomer is compared against every
+# open group's centroid in one vectorised distance, only the nearest few get an
+# exact score, and the chosen group is updated in place - milliseconds per
+# student instead of a full re-match.
+
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, List, Set, Tuple
+
+from .features import ANSWER_COLUMNS, RosterFeatures
+from .matching import MatchingService
+from .models import GroupResult, Placement, Student
+from .swaps import Assignment
+from .text_features import hash_text
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Open groups (or left-out students) scored exactly per newcomer, nearest centroid first
+CANDIDATES = 8
+
+# (gender, prefers_ac, room_capacity): students only share a room within one bucket
+BucketKey = Tuple[str, bool, int]
+
+
+class _Bucket:
+    """Open groups of one constraint bucket: group indexes and their answer-row sums, row-aligned"""
+
+    def __init__(self, columns: int):
+        import numpy as np
+        self.groups: List[int] = []
+        self.totals = np.zeros((0, columns))
+        self.sizes = np.zeros(0)
+
+    def add(self, group: int, total: "np.ndarray", size: int):
+        import numpy as np
+        self.groups.append(group)
+        self.totals = np.vstack([self.totals, total])
+        self.sizes = np.append(self.sizes, size)
+
+    def remove(self, slot: int):
+        import numpy as np
+        del self.groups[slot]
+        self.totals = np.delete(self.totals, slot, axis=0)
+        self.sizes = np.delete(self.sizes, slot)
+
+    def nearest(self, row: "np.ndarray", count: int) -> List[int]:
+        """Slots of the `count` groups whose centroid is closest to `row`"""
+        import numpy as np
+        distances = ((self.totals / self.sizes[:, None] - row) ** 2).sum(axis=1)
+        if len(distances) > count:
+            slots = np.argpartition(distances, count)[:count]
+            return slots[np.argsort(distances[slots])].tolist()
+        return np.argsort(distances).tolist()
+
+
+class PlacementIndex(Assignment):
+    """A stored run's assignment plus per-bucket open slots, for placing students who registered after it"""
+
+    def __init__(self, service: MatchingService, roster: RosterFeatures, run_groups: List[GroupResult],
+                 run_id: int, cohort: str, roster_version: int, late_ids: Iterable[str] = ()):
+        """`late_ids`: roster students registered (or changed) after the run's `roster_version`"""
+        import numpy as np
+        super().__init__(service, roster, run_groups)
+        self.run_id = run_id
+        # Runs this index has stored newer runs over (placing into them again gets a 409)
+        self.superseded: Set[int] = set()
+        self.cohort = cohort
+        # Runs stored from the index keep the base run's version, so its late registrants stay late
+        self.roster_version = roster_version
+        self.lock = threading.Lock()
+        self._keys: Dict[str, BucketKey] = {}
+        self.buckets: Dict[BucketKey, _Bucket] = {}
+        for index, members in enumerate(self.groups):
+            if not members:
+                continue
+            keys = {self._key(sid) for sid in members}
+            # Groups mixing gender or AC (runs from before grouping split by them) take no one else
+            if len(keys) == 1 and len(members) < self._capacity(members[0]):
+                positions = [self.roster.position(sid) for sid in members]
+                self._bucket(keys.pop()).add(index, self.roster.answers[positions].sum(axis=0, dtype=np.float64),
+                                             len(members))
+
+        # Students the run itself left out (single leftovers), not ones who registered after it
+        late = set(late_ids)
+        self.left_out: Dict[BucketKey, List[str]] = {}
+        for student_id in self.roster.student_ids:
+            if student_id not in self.group_of and student_id not in late:
+                self.left_out.setdefault(self._key(student_id), []).append(student_id)
+
+    def _key(self, student_id: str) -> BucketKey:
+        key = self._keys.get(student_id)
+        if key is None:
+            position = self.roster.position(student_id)
+            key = self._keys[student_id] = (self.roster.genders[int(self.roster.gender_codes[position])],
+                                            bool(self.roster.prefers_ac[position]),
+                                            int(self.roster.room_capacity[position]))
+        return key
+
+    def _bucket(self, key: BucketKey) -> _Bucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = _Bucket(len(ANSWER_COLUMNS))
+        return bucket
+
+    def _register(self, student: Student):
+        self._keys[student.student_id] = (student.gender, student.prefers_ac, student.room_capacity)
+        if self.roster.position(student.student_id) is None and student.student_id not in self._rows:
+            import numpy as np
+            answers = np.array([getattr(student, column) for column in ANSWER_COLUMNS], dtype=np.float64)
+            self.add_student(student.student_id, answers, hash_text(student.self_description), student.room_capacity)
+
+    def place(self, student: Student) -> Placement:
+        """
+        Put one student into the best open group of their bucket, or pair them with a
+        student the run left out. Students already in a group just get it reported.
+        """
+        student_id = student.student_id
+        if student.cohort != self.cohort:
+            return Placement(student_id=student_id, error="Student is in a different cohort than this match run")
+        group = self.group_of.get(student_id)
+        if group is not None:
+            return Placement(student_id=student_id, placed=True, group=group,
+                             score=self.group_score(self.group_sums(group), len(self.groups[group])))
+        self._register(student)
+        key = self._key(student_id)
+        capacity = student.room_capacity
+        row = self._row(student_id)
+        waiting = self.left_out.get(key, [])
+        if student_id in waiting:
+            waiting.remove(student_id)
+
+        bucket = self.buckets.get(key)
+        if bucket is not None and bucket.groups:
+            # Exact scores only for the groups with the nearest centroids
+            best = None
+            for slot in bucket.nearest(row, CANDIDATES):
+                group = bucket.groups[slot]
+                members = self.groups[group]
+                sums = self.sums_with(group, student_id)
+                score = self.group_score(sums, len(members) + 1)
+                if best is None or score > best[0]:
+                    best = (score, slot, sums)
+            score, slot, sums = best
+            group = bucket.groups[slot]
+            self.apply([(group, self.groups[group] + [student_id], sums)])
+            bucket.totals[slot] += row
+            bucket.sizes[slot] += 1
+            if len(self.groups[group]) >= capacity:
+                bucket.remove(slot)
+            return Placement(student_id=student_id, placed=True, group=group, score=score)
+
+        if not waiting:
+            return Placement(student_id=student_id,
+                             error="No open slot or left-out student with the same gender, AC and room capacity")
+
+        # Start a new group with the most compatible student the run left out in the bucket
+        import numpy as np
+        rows = np.array([self._row(sid) for sid in waiting])
+        nearest = np.argsort(((rows - row) ** 2).sum(axis=1))[:CANDIDATES].tolist()
+        score, partner = max((self.group_score(self._pair(student_id, waiting[i]), 2), i) for i in nearest)
+        members = [waiting.pop(partner), student_id]
+        group = len(self.groups)
+        self.groups.append([])
+        self.sums.append(None)
+        self.apply([(group, members, self._pair_sums(members))])
+        if capacity > 2:
+            self._bucket(key).add(group, rows[partner] + row, 2)
+        return Placement(student_id=student_id, placed=True, group=group, new_group=True, score=score)
+
+    def saved(self, run_id: int, groups: List[GroupResult]) -> bool:
+        """
+        Point the index at the run its groups were just stored as. False when group
+        indexes shifted (empty groups dropped), so the index no longer matches it.
+        """
+        if len(groups) != len(self.groups):
+            return False
+        self.superseded.add(self.run_id)
+        self.run_id = run_id
+        self.run_groups = groups
+        self.changed = set()
+        return True
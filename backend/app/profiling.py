@@ -0,0 +1,89 @@
+# backend/app/profiling.py
+
+import cProfile
+import os
+import pstats
+import re
+import tempfile
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Where downloadable .prof files are written (override with SMARTROOMIE_PROFILE_DIR)
+PROFILE_DIR = os.environ.get("SMARTROOMIE_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "smartroomie-profiles"))
+
+# Newest .prof files kept; older ones are deleted as new ones are saved (SMARTROOMIE_PROFILE_KEEP)
+PROFILE_KEEP = int(os.environ.get("SMARTROOMIE_PROFILE_KEEP", "50"))
+
+_PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _hotspots(stats: pstats.Stats, top_n: int, sort_key: str) -> List[Dict[str, Any]]:
+    """Top-N functions from a pstats.Stats as plain dicts"""
+    stats.sort_stats(sort_key)
+    hotspots = []
+    for func in stats.fcn_list[:top_n]:
+        primitive_calls, total_calls, total_time, cumulative_time, _ = stats.stats[func]
+        filename, line, name = func
+        hotspots.append({
+            "function": name,
+            "file": os.path.basename(filename) if filename != "~" else "<built-in>",
+            "line": line,
+            "calls": total_calls,
+            "primitive_calls": primitive_calls,
+            "total_time_ms": round(total_time * 1000, 3),
+            "cumulative_time_ms": round(cumulative_time * 1000, 3)
+        })
+    return hotspots
+
+
+def _prune_profiles(keep: int):
+    """Delete all but the `keep` newest .prof files"""
+    paths = []
+    for entry in os.scandir(PROFILE_DIR):
+        if entry.name.endswith(".prof") and _PROFILE_ID_PATTERN.match(entry.name[:-len(".prof")]):
+            try:
+                paths.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                continue  # pruned by a concurrent call
+    paths.sort(reverse=True)
+    for _, path in paths[keep:]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def profile_call(func: Callable[[], Any], top_n: int = 25,
+                 sort_key: str = "cumulative") -> Tuple[Any, Dict[str, Any]]:
+    """
+    Run func under cProfile (in the calling thread) and return (result, profile).
+    The profile holds the top-N hotspots and the id of a saved .prof file
+    that load_profile_path can find again (until PROFILE_KEEP newer ones exist).
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        result = func()
+    finally:
+        profiler.disable()
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profile_id = uuid.uuid4().hex
+    profiler.dump_stats(os.path.join(PROFILE_DIR, f"{profile_id}.prof"))
+    _prune_profiles(PROFILE_KEEP)
+
+    stats = pstats.Stats(profiler)
+    return result, {
+        "profile_id": profile_id,
+        "total_time_ms": round(stats.total_tt * 1000, 3),
+        "sort": sort_key,
+        "hotspots": _hotspots(stats, top_n, sort_key)
+    }
+
+
+def load_profile_path(profile_id: str) -> Optional[str]:
+    """Path of a saved .prof file, or None if the id is unknown or malformed"""
+    if not _PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.prof")
+    return path if os.path.exists(path) else None
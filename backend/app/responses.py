@@ -0,0 +1,41 @@
+# backend/app/responses.py
+
+from functools import lru_cache
+from typing import Any, List, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """Cached List[model] adapter, so the serializer is only built once per model"""
+    return TypeAdapter(List[model])
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Serialize pydantic models nested in plain dicts/lists"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response for large payloads the server built itself.
+
+    Returning one of these directly from an endpoint skips FastAPI's
+    response_model validation (the route's response_model still documents the
+    shape in OpenAPI). Models and homogeneous model lists are encoded straight
+    to bytes by pydantic-core; everything else goes through orjson.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        if isinstance(content, list) and content and isinstance(content[0], BaseModel):
+            model = type(content[0])
+            if all(type(item) is model for item in content):
+                return _list_adapter(model).dump_json(content)
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
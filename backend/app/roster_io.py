@@ -0,0 +1,109 @@
+# backend/app/roster_io.py
+
+import csv
+import io
+import json
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from .storage import StudentStore, STUDENT_EXPORT_COLUMNS
+from .models import StudentCreate
+
+# Maximum number of failed rows described in an import report
+MAX_REPORTED_ERRORS = 100
+
+
+def _json_default(value):
+    """Fallback encoder for values json.dumps doesn't know (timestamps from SQLite are already strings)"""
+    return str(value)
+
+
+def export_csv(db: StudentStore, batch_size: int = 1000) -> Iterator[str]:
+    """Stream the roster as CSV, one chunk per database batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(STUDENT_EXPORT_COLUMNS)
+    for batch in db.iter_student_batches(batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only, for an empty roster
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_ndjson(db: StudentStore, batch_size: int = 1000) -> Iterator[str]:
+    """Stream the roster as newline-delimited JSON, one chunk per database batch"""
+    for batch in db.iter_student_batches(batch_size):
+        yield "".join(
+            json.dumps(dict(zip(STUDENT_EXPORT_COLUMNS, row)), default=_json_default) + "\n"
+            for row in batch
+        )
+
+
+def _iter_records(stream: IO[str], fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """Yield (row_number, record, parse_error) for each row of an uploaded roster"""
+    if fmt == "ndjson":
+        for row_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, "Expected a JSON object"
+                continue
+            yield row_number, record, None
+    else:
+        # Row numbers count the header as row 1, like a spreadsheet
+        for row_number, record in enumerate(csv.DictReader(stream), start=2):
+            # Empty cells mean "not provided" (e.g. self_description)
+            yield row_number, {k: v for k, v in record.items() if k and v != ""}, None
+
+
+def import_roster(db: StudentStore, upload: IO[bytes], fmt: str = "csv", batch_size: int = 500) -> Dict:
+    """
+    Parse an uploaded CSV/NDJSON roster incrementally and insert it in batched
+    transactions. Returns a report with counts and the first failing rows.
+    """
+    stream = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+    parse_failed = 0
+    parse_errors: List[Dict] = []
+
+    def valid_students():
+        nonlocal parse_failed
+        for row_number, record, error in _iter_records(stream, fmt):
+            if error is None:
+                try:
+                    yield row_number, StudentCreate(**record)
+                    continue
+                except ValidationError as e:
+                    error = "; ".join(
+                        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+                    )
+            parse_failed += 1
+            if len(parse_errors) < MAX_REPORTED_ERRORS:
+                parse_errors.append({
+                    "row": row_number,
+                    "student_id": (record or {}).get("student_id"),
+                    "error": error
+                })
+
+    try:
+        result = db.create_students_bulk(valid_students(), batch_size=batch_size, max_errors=MAX_REPORTED_ERRORS)
+    finally:
+        # Don't let the wrapper close the underlying upload file
+        stream.detach()
+
+    errors = sorted(parse_errors + result["errors"], key=lambda e: e["row"])
+    failed = parse_failed + result["failed"]
+    return {
+        "inserted": result["inserted"],
+        "failed": failed,
+        "errors": errors[:MAX_REPORTED_ERRORS],
+        "errors_truncated": failed > MAX_REPORTED_ERRORS
+    }
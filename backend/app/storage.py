@@ -0,0 +1,150 @@
+# backend/app/storage.py
+
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import ContextManager, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .models import Student, StudentCreate, GroupResult, DEFAULT_COHORT
+
+# Columns written by create_student, in insert order
+STUDENT_INSERT_COLUMNS = [
+    'name', 'student_id', 'contact_info', 'email', 'prefers_ac', 'room_capacity', 'gender',
+    'q1_sleep', 'q2_tidy', 'q3_noise', 'q4_friends_freq', 'q5_friday_pref',
+    'q6_overnight_guests', 'q7_conflict_style', 'q8_alone_time',
+    'q9_sports_games', 'q10_movies_music', 'self_description', 'cohort'
+]
+
+# Columns included in roster exports (iter_student_batches tuples follow this order)
+STUDENT_EXPORT_COLUMNS = STUDENT_INSERT_COLUMNS + ['created_at', 'updated_at']
+
+
+class RosterSnapshot(ABC):
+    """Consistent read-only view of the roster (or of one cohort) at one version"""
+
+    version: int  # change token the view corresponds to
+    cohort: Optional[str]  # cohort the view is limited to, None for every cohort
+
+    @abstractmethod
+    def get_student(self, student_id: str) -> Optional[Student]:
+        """Get a student by their ID as of this snapshot"""
+
+    @abstractmethod
+    def get_all_students(self) -> List[Student]:
+        """Get all students as of this snapshot, newest first"""
+
+    @abstractmethod
+    def iter_student_batches(self, batch_size: int = 1000) -> Iterator[List[Tuple]]:
+        """Stream the snapshot's roster, newest first, as batches of tuples in STUDENT_EXPORT_COLUMNS order"""
+
+    @abstractmethod
+    def iter_text_vectors(self, batch_size: int = 1000) -> Iterator[List[Optional[bytes]]]:
+        """
+        Stream the stored self-description vectors (see text_features.hash_text) in the
+        same order as iter_student_batches; None for students without any terms
+        """
+
+
+class StudentStore(ABC):
+    """Storage interface used by the API and MatchingService"""
+
+    @abstractmethod
+    def init_db(self):
+        """Create tables/structures if needed"""
+
+    @abstractmethod
+    def ping(self) -> bool:
+        """Cheap liveness probe"""
+
+    @abstractmethod
+    def integrity_check(self) -> str:
+        """Thorough consistency check, returns "ok" when healthy"""
+
+    @abstractmethod
+    def get_stats(self, cohort: Optional[str] = None) -> Dict[str, int]:
+        """Student counts by gender and AC preference, for one cohort or all of them"""
+
+    @abstractmethod
+    def list_cohorts(self) -> Dict[str, int]:
+        """Student count per cohort"""
+
+    @abstractmethod
+    def create_student(self, student_data: StudentCreate) -> str:
+        """Create a student, raising ValueError on duplicates; returns the student_id"""
+
+    @abstractmethod
+    def get_student(self, student_id: str) -> Optional[Student]:
+        """Get a student by their ID"""
+
+    @abstractmethod
+    def get_all_students(self, cohort: Optional[str] = None) -> List[Student]:
+        """Get all students (of one cohort, if given), newest first"""
+
+    @abstractmethod
+    def delete_student(self, student_id: str) -> bool:
+        """Delete a student, returns False if it didn't exist"""
+
+    @abstractmethod
+    def update_student_timestamp(self, student_id: str):
+        """Update the updated_at timestamp for a student"""
+
+    @abstractmethod
+    def get_changes_since(self, since: int = 0, cohort: Optional[str] = None) -> Dict:
+        """Students inserted/updated/deleted after a change token (see StudentChanges), optionally in one cohort"""
+
+    @abstractmethod
+    def iter_student_batches(self, batch_size: int = 1000) -> Iterator[List[Tuple]]:
+        """Stream the roster as batches of tuples in STUDENT_EXPORT_COLUMNS order"""
+
+    @abstractmethod
+    def create_students_bulk(self, students: Iterable[Tuple[int, StudentCreate]],
+                             batch_size: int = 500, max_errors: int = 100) -> Dict:
+        """Insert (row_number, StudentCreate) pairs, returns inserted/failed counts and errors"""
+
+    @abstractmethod
+    def archive_students(self, cohort: Optional[str] = None, created_before: Optional[datetime] = None,
+                         batch_size: int = 1000) -> Iterator[Dict[str, int]]:
+        """
+        Move the students of a cohort and/or created before a (naive UTC) time into the archive,
+        batch_size per transaction, oldest first. At least one filter is required (ValueError).
+        Yields {"archived", "total"} after each committed batch; archived students show up as
+        deletions in the change log.
+        """
+
+    @abstractmethod
+    def optimize_storage(self, vacuum: bool = False) -> Dict:
+        """Refresh query planner statistics and, with vacuum, reclaim free space; returns what was done"""
+
+    @abstractmethod
+    def get_version(self, cohort: Optional[str] = None) -> int:
+        """Roster version: the latest change token, bumped by every write (to that cohort, if given)"""
+
+    @abstractmethod
+    def get_student_version(self, student_id: str) -> int:
+        """Latest change token that touched one student (0 if never logged)"""
+
+    @abstractmethod
+    def read_snapshot(self, cohort: Optional[str] = None) -> ContextManager[RosterSnapshot]:
+        """
+        Open a consistent view of the roster, or of one cohort. Writes keep
+        going while it is open; reads through it never see them.
+        """
+
+    @abstractmethod
+    def save_match_run(self, groups: List[GroupResult], roster_version: int,
+                       seed: Optional[int] = None, cohort: str = DEFAULT_COHORT) -> int:
+        """Store the groups of a cohort's match run with the snapshot version and RNG seed it used, returns its run_id"""
+
+    @abstractmethod
+    def get_match_run(self, run_id: int) -> Optional[Dict]:
+        """
+        Get a stored match run as a dict with run_id, cohort, roster_version, seed, created_at,
+        group_count and groups_json (the encoded List[GroupResult] bytes, without null fields)
+        """
+
+    @abstractmethod
+    def get_latest_match_run_id(self, cohort: Optional[str] = None) -> Optional[int]:
+        """run_id of the most recent match run (of one cohort, if given), or None"""
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss metrics for any caches the backend keeps"""
+        return {}
@@ -0,0 +1,263 @@
+# backend/app/swaps.py
+
+# What-if edits of a stored match run. Every group keeps running per-domain sums
+# of its pairwise similarities (worked out the first time the group is touched),
+# so evaluating a swap or move only scores the pairs involving the students that
+# change groups - O(group size) per proposal instead of re-running the whole match.
+
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Set, Tuple
+
+from pydantic import TypeAdapter
+
+from .features import RosterFeatures
+from .matching import MatchingService, DOMAINS, TEXT_PAIRS
+from .models import GroupResult, SwapProposal, ProposalResult
+from .text_features import cosine
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_group_list_adapter = TypeAdapter(List[GroupResult])
+
+# (group index, members after the edit, per-domain similarity sums after the edit)
+_GroupEdit = Tuple[int, List[str], Dict[str, float]]
+
+
+class ProposalError(ValueError):
+    """A proposal that can't be applied to the current assignment"""
+
+
+# Keys of the running sums: every domain plus the number of pairs with a text score
+_SUMMED = DOMAINS + [TEXT_PAIRS]
+
+
+def _combine(sums: Dict[str, float], other: Dict[str, float], sign: float) -> Dict[str, float]:
+    return {key: sums[key] + sign * other[key] for key in _SUMMED}
+
+
+class Assignment:
+    """Groups of a stored match run plus the similarity sums needed for delta scoring"""
+
+    def __init__(self, service: MatchingService, roster: RosterFeatures, run_groups: List[GroupResult]):
+        self.service = service
+        self.roster = roster
+        self.run_groups = run_groups
+        self.groups: List[List[str]] = []
+        self.sums: List[Optional[Dict[str, float]]] = []
+        self.group_of: Dict[str, int] = {}
+        self.changed: Set[int] = set()
+        self._rows: Dict[str, "np.ndarray"] = {}
+        self._texts: Dict[str, Tuple["np.ndarray", "np.ndarray"]] = {}
+        self._capacities: Dict[str, int] = {}
+        self._pairs: Dict[Tuple[str, str], Dict[str, float]] = {}
+
+        for index, group in enumerate(run_groups):
+            if not group.member_ids or group.legacy_names is not None:
+                raise ValueError("This match run was stored before group members were recorded; run matching again")
+            # Students deleted since the run simply leave their group
+            members = [sid for sid in group.member_ids if roster.position(sid) is not None]
+            if len(members) != len(group.member_ids):
+                self.changed.add(index)
+            self.groups.append(members)
+            self.sums.append(None)
+            for sid in members:
+                self.group_of[sid] = index
+
+    @classmethod
+    def from_run(cls, service: MatchingService, roster: RosterFeatures, groups_json: bytes) -> "Assignment":
+        """Build from a stored run's encoded groups"""
+        return cls(service, roster, _group_list_adapter.validate_json(groups_json))
+
+    def add_student(self, student_id: str, answers: "np.ndarray", text_vector: Optional[bytes], capacity: int):
+        """Make a student missing from the roster (registered after it was loaded) known to the assignment"""
+        self._rows[student_id] = answers
+        self._texts[student_id] = self.roster.weigh_text(text_vector)
+        self._capacities[student_id] = capacity
+
+    def _row(self, student_id: str) -> "np.ndarray":
+        row = self._rows.get(student_id)
+        if row is None:
+            import numpy as np
+            row = self._rows[student_id] = self.roster.answers[self.roster.position(student_id)].astype(np.float64)
+        return row
+
+    def _text(self, student_id: str) -> Tuple["np.ndarray", "np.ndarray"]:
+        text = self._texts.get(student_id)
+        if text is None:
+            text = self._texts[student_id] = self.roster.text_row(self.roster.position(student_id))
+        return text
+
+    def _pair(self, a: str, b: str) -> Dict[str, float]:
+        key = (a, b) if a < b else (b, a)
+        similarities = self._pairs.get(key)
+        if similarities is None:
+            text_a, text_b = self._text(a), self._text(b)
+            # Only pairs where both wrote a description get a text score
+            text_cosine = cosine(text_a, text_b) if len(text_a[0]) and len(text_b[0]) else None
+            similarities = self._pairs[key] = self.service.pair_similarities(self._row(a), self._row(b), text_cosine)
+        return similarities
+
+    def _similarity_to(self, student_id: str, members: Sequence[str]) -> Dict[str, float]:
+        """Per-domain sum of one student's similarity to each of `members`"""
+        sums = dict.fromkeys(_SUMMED, 0.0)
+        for member in members:
+            sums = _combine(sums, self._pair(student_id, member), 1)
+        return sums
+
+    def _pair_sums(self, members: Sequence[str]) -> Dict[str, float]:
+        sums = dict.fromkeys(_SUMMED, 0.0)
+        for i, member in enumerate(members):
+            sums = _combine(sums, self._similarity_to(member, members[i + 1:]), 1)
+        return sums
+
+    def group_sums(self, group: int) -> Dict[str, float]:
+        """Per-domain similarity sums of a group's current members"""
+        sums = self.sums[group]
+        if sums is None:
+            sums = self.sums[group] = self._pair_sums(self.groups[group])
+        return sums
+
+    def sums_with(self, group: int, student_id: str) -> Dict[str, float]:
+        """A group's similarity sums if `student_id` joined it"""
+        return _combine(self.group_sums(group), self._similarity_to(student_id, self.groups[group]), 1)
+
+    def _averages(self, sums: Dict[str, float], size: int) -> Dict[str, Optional[float]]:
+        """Average similarity per domain; text over the pairs that have it (None when none do)"""
+        pairs = size * (size - 1) / 2
+        if not pairs:
+            return dict.fromkeys(DOMAINS, 0.0)
+        # Clamp away rounding drift from the running sums
+        averages = {domain: max(0.0, min(1.0, sums[domain] / pairs)) for domain in DOMAINS}
+        text_pairs = round(sums[TEXT_PAIRS])
+        averages['text'] = max(0.0, min(1.0, sums['text'] / text_pairs)) if text_pairs else None
+        return averages
+
+    def group_score(self, sums: Dict[str, float], size: int) -> float:
+        """Noise-free group score, as calculate_group_compatibility_score would give without variation"""
+        if size < 2:
+            return 0.0
+        text_coverage = round(sums[TEXT_PAIRS]) / (size * (size - 1) / 2)
+        return self.service.combine_similarities(self._averages(sums, size), size, text_coverage)
+
+    def _capacity(self, student_id: str) -> int:
+        capacity = self._capacities.get(student_id)
+        if capacity is None:
+            capacity = self._capacities[student_id] = int(self.roster.room_capacity[self.roster.position(student_id)])
+        return capacity
+
+    def _find(self, student_id: Optional[str]) -> int:
+        group = self.group_of.get(student_id)
+        if group is None:
+            raise ProposalError(f"Student {student_id} is not in this match run")
+        return group
+
+    def plan(self, proposal: SwapProposal) -> List[_GroupEdit]:
+        """Work out the groups a proposal changes, without applying it"""
+        student_id = proposal.student_id
+        source = self._find(student_id)
+        source_rest = [m for m in self.groups[source] if m != student_id]
+
+        if proposal.action == "swap":
+            other_id = proposal.other_student_id
+            target = self._find(other_id)
+            if target == source:
+                raise ProposalError("Both students are already in the same group")
+            if self._capacity(student_id) != self._capacity(other_id):
+                raise ProposalError("Students want different room capacities")
+            target_rest = [m for m in self.groups[target] if m != other_id]
+            source_sums = _combine(_combine(self.group_sums(source), self._similarity_to(student_id, source_rest), -1),
+                                   self._similarity_to(other_id, source_rest), 1)
+            target_sums = _combine(_combine(self.group_sums(target), self._similarity_to(other_id, target_rest), -1),
+                                   self._similarity_to(student_id, target_rest), 1)
+            return [
+                (source, [other_id if m == student_id else m for m in self.groups[source]], source_sums),
+                (target, [student_id if m == other_id else m for m in self.groups[target]], target_sums)
+            ]
+
+        target = proposal.to_group
+        if target is None or target >= len(self.groups):
+            raise ProposalError("to_group must be the index of a group in this match run")
+        if target == source:
+            raise ProposalError("Student is already in that group")
+        target_members = self.groups[target]
+        if target_members:
+            capacity = self._capacity(target_members[0])
+            if self._capacity(student_id) != capacity:
+                raise ProposalError("Student wants a different room capacity than that group")
+            if len(target_members) >= capacity:
+                raise ProposalError("Target group is full")
+        return [
+            (source, source_rest, _combine(self.group_sums(source), self._similarity_to(student_id, source_rest), -1)),
+            (target, target_members + [student_id], self.sums_with(target, student_id))
+        ]
+
+    def score_change(self, edits: List[_GroupEdit]) -> Tuple[float, float]:
+        """(summed score before, summed score after) of the groups an edit touches"""
+        before = sum(self.group_score(self.group_sums(g), len(self.groups[g])) for g, _, _ in edits)
+        after = sum(self.group_score(sums, len(members)) for _, members, sums in edits)
+        return before, after
+
+    def apply(self, edits: List[_GroupEdit]):
+        for group, members, sums in edits:
+            self.groups[group] = members
+            self.sums[group] = sums
+            self.changed.add(group)
+            for sid in members:
+                self.group_of[sid] = group
+
+    def evaluate(self, proposals: List[SwapProposal], commit: bool = False,
+                 only_improving: bool = True) -> List[ProposalResult]:
+        """
+        Score every proposal against the run as stored. With commit, the valid ones are
+        then applied in order, each re-checked against the edits accepted before it.
+        """
+        results = []
+        for index, proposal in enumerate(proposals):
+            try:
+                edits = self.plan(proposal)
+            except ProposalError as e:
+                results.append(ProposalResult(index=index, valid=False, error=str(e)))
+                continue
+            before, after = self.score_change(edits)
+            results.append(ProposalResult(
+                index=index, valid=True, groups=[g for g, _, _ in edits],
+                score_before=before, score_after=after, delta=after - before
+            ))
+
+        if commit:
+            for result, proposal in zip(results, proposals):
+                if not result.valid:
+                    continue
+                try:
+                    edits = self.plan(proposal)
+                except ProposalError:
+                    continue
+                before, after = self.score_change(edits)
+                if only_improving and after <= before:
+                    continue
+                self.apply(edits)
+                result.committed = True
+        return results
+
+    def to_groups(self) -> List[GroupResult]:
+        """
+        The run's groups with edited ones rescored. Group order is kept so
+        indexes stay meaningful; groups left empty are dropped.
+        """
+        groups = []
+        for index, members in enumerate(self.groups):
+            if index not in self.changed:
+                groups.append(self.run_groups[index])
+                continue
+            if not members:
+                continue
+            size = len(members)
+            score = self.group_score(self.group_sums(index), size)
+            similarities = self._averages(self.group_sums(index), size)
+            groups.append(GroupResult(
+                member_ids=members,
+                score=score,
+                domain_scores=[similarities[domain] for domain in DOMAINS],
+                explanation_codes=self.service.explanation_codes(score, similarities)
+            ))
+        return groups
@@ -0,0 +1,143 @@
+# backend/app/text_features.py
+
+# Hashed TF-IDF vectors for self_description. Term frequencies are hashed into a
+# fixed number of dimensions once, when a student registers, and stored packed.
+# Match runs weight them by the roster's IDF and get the pair similarities of a
+# whole bucket from one vectorised sparse product - no per-pair text processing.
+
+import math
+import re
+import zlib
+from array import array
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Size of the hashed term space (collisions are rare at this size and harmless)
+TEXT_DIMENSIONS = 2 ** 16
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset("""
+    a about am an and are as at be but by can do for from have i im in into is it its
+    just like me more my of on or our so than that the their them they this to too
+    very was we what when with you your
+""".split())
+
+
+def _term_counts(text: Optional[str]) -> Dict[int, int]:
+    """Hashed term -> count (crc32 rather than hash(), which changes between processes)"""
+    counts: Dict[int, int] = {}
+    for token in _TOKEN.findall((text or "").lower().replace("'", "")):
+        if len(token) < 2 or token in _STOPWORDS:
+            continue
+        term = zlib.crc32(token.encode("utf-8")) % TEXT_DIMENSIONS
+        counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+def hash_text(text: Optional[str]) -> Optional[bytes]:
+    """
+    Packed sparse term-frequency vector for a self-description: sorted uint32 term
+    ids followed by float32 weights (1 + log tf). None when there are no terms.
+    """
+    counts = _term_counts(text)
+    if not counts:
+        return None
+    terms = sorted(counts)
+    return array("I", terms).tobytes() + array("f", [1.0 + math.log(counts[t]) for t in terms]).tobytes()
+
+
+def unpack(vector: Optional[bytes]) -> Tuple["np.ndarray", "np.ndarray"]:
+    """(term ids, weights) arrays of a packed vector"""
+    import numpy as np
+    if not vector:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.float32)
+    size = len(vector) // 8
+    return (np.frombuffer(vector, dtype=np.uint32, count=size),
+            np.frombuffer(vector, dtype=np.float32, count=size, offset=size * 4))
+
+
+def build_csr(vectors: Iterable[Optional[bytes]]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Stack packed vectors into CSR arrays (indptr, term ids, weights), one row per vector"""
+    import numpy as np
+    indptr = [0]
+    terms, weights = [], []
+    for vector in vectors:
+        row_terms, row_weights = unpack(vector)
+        terms.append(row_terms)
+        weights.append(row_weights)
+        indptr.append(indptr[-1] + len(row_terms))
+    return (
+        np.array(indptr, dtype=np.int64),
+        np.concatenate(terms) if terms else np.zeros(0, dtype=np.uint32),
+        np.concatenate(weights) if weights else np.zeros(0, dtype=np.float32)
+    )
+
+
+def normalize_rows(indptr: "np.ndarray", values: "np.ndarray") -> "np.ndarray":
+    """CSR values scaled to unit L2 norm per row"""
+    import numpy as np
+    rows = len(indptr) - 1
+    if not len(values):
+        return np.zeros(0, dtype=np.float32)
+    row_ids = np.repeat(np.arange(rows), np.diff(indptr))
+    norms = np.sqrt(np.bincount(row_ids, weights=values * values, minlength=rows))
+    return (values / norms[row_ids]).astype(np.float32)
+
+
+def inverse_document_frequency(indptr: "np.ndarray", terms: "np.ndarray") -> "np.ndarray":
+    """Smoothed IDF of every hashed term over these rows"""
+    import numpy as np
+    rows = len(indptr) - 1
+    document_frequency = np.bincount(terms, minlength=TEXT_DIMENSIONS)
+    return np.log((1 + rows) / (1 + document_frequency)) + 1
+
+
+def tfidf_weights(indptr: "np.ndarray", terms: "np.ndarray", weights: "np.ndarray",
+                  idf: Optional["np.ndarray"] = None) -> "np.ndarray":
+    """Term weights scaled by smoothed IDF (over these rows unless given) and L2-normalised per row"""
+    import numpy as np
+    if not len(terms):
+        return np.zeros(0, dtype=np.float32)
+    if idf is None:
+        idf = inverse_document_frequency(indptr, terms)
+    return normalize_rows(indptr, weights * idf[terms])
+
+
+def _gather(indptr: "np.ndarray", rows: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """For each requested row: (position in `rows` per stored entry, index of that entry)"""
+    import numpy as np
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    owner = np.repeat(np.arange(len(rows)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return owner, np.repeat(starts, lengths) + offsets
+
+
+def pair_cosines(indptr: "np.ndarray", terms: "np.ndarray", values: "np.ndarray",
+                 left: "np.ndarray", right: "np.ndarray") -> "np.ndarray":
+    """
+    Cosine similarity for each (left[k], right[k]) row pair of normalised CSR rows,
+    computed as one sparse row-wise product over all the pairs at once. Clamped to
+    0-1: float32 weights put identical rows a hair above 1.
+    """
+    import numpy as np
+    if not len(left):
+        return np.zeros(0)
+    left_owner, left_entries = _gather(indptr, np.asarray(left))
+    right_owner, right_entries = _gather(indptr, np.asarray(right))
+    # Terms are unique within a row, so (pair, term) keys are unique on each side
+    left_keys = left_owner * TEXT_DIMENSIONS + terms[left_entries].astype(np.int64)
+    right_keys = right_owner * TEXT_DIMENSIONS + terms[right_entries].astype(np.int64)
+    shared, left_hits, right_hits = np.intersect1d(left_keys, right_keys, assume_unique=True, return_indices=True)
+    products = values[left_entries[left_hits]].astype(np.float64) * values[right_entries[right_hits]]
+    return np.clip(np.bincount(shared // TEXT_DIMENSIONS, weights=products, minlength=len(left)), 0.0, 1.0)
+
+
+def cosine(left: Tuple["np.ndarray", "np.ndarray"], right: Tuple["np.ndarray", "np.ndarray"]) -> float:
+    """Cosine of two normalised (term ids, weights) vectors, for one-off pairs (clamped to 0-1 like pair_cosines)"""
+    import numpy as np
+    _, left_hits, right_hits = np.intersect1d(left[0], right[0], assume_unique=True, return_indices=True)
+    return max(0.0, min(1.0, float(np.dot(left[1][left_hits].astype(np.float64), right[1][right_hits]))))
+
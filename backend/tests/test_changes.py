@@ -0,0 +1,40 @@
+# backend/tests/test_changes.py
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import Database
+from app.memory_store import InMemoryDatabase
+from app.models import StudentCreate
+
+
+def _student(cohort: str) -> StudentCreate:
+    answers = {q: 3 for q in [
+        'q1_sleep', 'q2_tidy', 'q3_noise', 'q4_friends_freq', 'q5_friday_pref',
+        'q6_overnight_guests', 'q7_conflict_style', 'q8_alone_time', 'q9_sports_games', 'q10_movies_music'
+    ]}
+    return StudentCreate(name="Student", student_id="S1", contact_info="555", email="s1@example.com",
+                         prefers_ac=True, room_capacity=2, gender="Male", cohort=cohort, **answers)
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def store(request, tmp_path):
+    store = Database(str(tmp_path / "smartroomie.db")) if request.param == "sqlite" else InMemoryDatabase()
+    store.init_db()
+    return store
+
+
+def test_student_moved_to_another_cohort_is_deleted_from_the_first(store):
+    store.create_student(_student("fall"))
+    since = store.get_version("fall")
+    store.delete_student("S1")
+    store.create_student(_student("spring"))
+
+    fall = store.get_changes_since(since, "fall")
+    assert fall["students"] == [] and fall["deleted"] == ["S1"]
+    spring = store.get_changes_since(since, "spring")
+    assert [s.student_id for s in spring["students"]] == ["S1"]
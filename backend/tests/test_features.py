@@ -0,0 +1,39 @@
+# backend/tests/test_features.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import Database
+from app.features import FeatureStore
+from app.models import StudentCreate
+
+
+def _student(i: int, cohort: str) -> StudentCreate:
+    answers = {q: 3 for q in [
+        'q1_sleep', 'q2_tidy', 'q3_noise', 'q4_friends_freq', 'q5_friday_pref',
+        'q6_overnight_guests', 'q7_conflict_style', 'q8_alone_time', 'q9_sports_games', 'q10_movies_music'
+    ]}
+    return StudentCreate(name=f"Student {i}", student_id=f"S{i}", contact_info="555", email=f"s{i}@example.com",
+                         prefers_ac=True, room_capacity=2, gender="Male", cohort=cohort, **answers)
+
+
+def test_empty_cohorts_leave_no_trace(tmp_path):
+    db = Database(str(tmp_path / "smartroomie.db"))
+    db.init_db()
+    db.create_students_bulk((i, _student(i, "fall")) for i in range(3))
+    db.create_student(_student(9, "spring"))
+    db.delete_student("S9")
+    features = FeatureStore(str(tmp_path / "features"))
+
+    # A name nobody registered in, and a cohort whose students were all deleted (version > 0)
+    for cohort in ["nobody", "spring"]:
+        with db.read_snapshot(cohort) as snapshot:
+            assert len(features.load(snapshot)) == 0
+        assert not os.path.exists(tmp_path / "features" / cohort)
+    assert features.stats()["cohorts"] == {}
+
+    with db.read_snapshot("fall") as snapshot:
+        assert len(features.load(snapshot)) == 3
+    assert list(features.stats()["cohorts"]) == ["fall"]
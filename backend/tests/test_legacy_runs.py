@@ -0,0 +1,67 @@
+# backend/tests/test_legacy_runs.py
+
+import json
+import os
+import sys
+from datetime import datetime
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import Database
+from app.matching import MatchingService
+from app.models import GroupResult, StudentCreate
+from app.placement import PlacementIndex
+from app.swaps import Assignment
+
+
+def _student(i: int) -> StudentCreate:
+    answers = {q: 1 + i % 5 for q in [
+        'q1_sleep', 'q2_tidy', 'q3_noise', 'q4_friends_freq', 'q5_friday_pref',
+        'q6_overnight_guests', 'q7_conflict_style', 'q8_alone_time', 'q9_sports_games', 'q10_movies_music'
+    ]}
+    return StudentCreate(name=f"N{i}", student_id=f"S{i}", contact_info="555", email=f"s{i}@example.com",
+                         prefers_ac=True, room_capacity=4, gender="Male", **answers)
+
+
+def _legacy_run(db: Database) -> int:
+    """A 4-sharing room stored the way runs were before member_ids existed"""
+    match = {
+        "student1_id": "S0", "student2_id": "S1",
+        "student1_name": "N0 + N1 + N2 + N3", "student2_name": "4-sharing group",
+        "compatibility_score": 0.8, "habits_similarity": 0.8, "social_similarity": 0.7,
+        "conflict_similarity": 0.9, "interests_similarity": 0.6, "constraints_matched": True,
+        "match_explanation": "Good group", "created_at": datetime(2024, 1, 1).isoformat()
+    }
+    conn = db.get_connection()
+    conn.execute("INSERT INTO match_runs (roster_version, match_count, results, cohort) VALUES (?, 1, ?, 'default')",
+                 (db.get_version(), json.dumps([match])))
+    conn.commit()
+    run_id = conn.execute("SELECT MAX(run_id) FROM match_runs").fetchone()[0]
+    conn.close()
+    return run_id
+
+
+def test_legacy_groups_are_incomplete_not_two_sharing(tmp_path):
+    db = Database(str(tmp_path / "smartroomie.db"))
+    db.init_db()
+    db.create_students_bulk((i, _student(i)) for i in range(5))
+    service = MatchingService(db)
+    run = db.get_match_run(_legacy_run(db))
+    with db.read_snapshot() as snapshot:
+        roster = service.features.load(snapshot)
+
+    groups = TypeAdapter(List[GroupResult]).validate_json(run["groups_json"])
+
+    # Shown as stored, not as a "N0 + N1" pair
+    match = service.to_match_results(groups, roster)[0]
+    assert (match.student1_name, match.student2_name) == ("N0 + N1 + N2 + N3", "4-sharing group")
+
+    # Edits and placements would treat the full room as half empty: refused
+    with pytest.raises(ValueError):
+        Assignment.from_run(service, roster, run["groups_json"])
+    with pytest.raises(ValueError):
+        PlacementIndex(service, roster, groups, run["run_id"], "default", run["roster_version"])
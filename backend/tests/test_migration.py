@@ -0,0 +1,69 @@
+# backend/tests/test_migration.py
+
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import Database
+from app.features import FeatureStore
+
+# The students table as the first release created it: no cohort, no text vectors, no change log
+PRE_SERIES_SCHEMA = """
+    CREATE TABLE students (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        student_id TEXT UNIQUE NOT NULL,
+        contact_info TEXT NOT NULL,
+        email TEXT NOT NULL,
+        prefers_ac BOOLEAN NOT NULL,
+        room_capacity INTEGER NOT NULL,
+        gender TEXT NOT NULL,
+        q1_sleep INTEGER NOT NULL,
+        q2_tidy INTEGER NOT NULL,
+        q3_noise INTEGER NOT NULL,
+        q4_friends_freq INTEGER NOT NULL,
+        q5_friday_pref INTEGER NOT NULL,
+        q6_overnight_guests INTEGER NOT NULL,
+        q7_conflict_style INTEGER NOT NULL,
+        q8_alone_time INTEGER NOT NULL,
+        q9_sports_games INTEGER NOT NULL,
+        q10_movies_music INTEGER NOT NULL,
+        self_description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def _pre_series_database(path: str, students: int):
+    conn = sqlite3.connect(path)
+    conn.execute(PRE_SERIES_SCHEMA)
+    conn.executemany(
+        "INSERT INTO students (name, student_id, contact_info, email, prefers_ac, room_capacity, gender, "
+        "q1_sleep, q2_tidy, q3_noise, q4_friends_freq, q5_friday_pref, q6_overnight_guests, "
+        "q7_conflict_style, q8_alone_time, q9_sports_games, q10_movies_music, self_description) "
+        "VALUES (?, ?, '555', 'x@example.com', 1, 2, 'Male', 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, ?)",
+        [(f"Student {i}", f"S{i}", "quiet and tidy" if i % 2 else None) for i in range(students)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_upgraded_database_keeps_its_roster(tmp_path):
+    path = str(tmp_path / "smartroomie.db")
+    _pre_series_database(path, 5)
+    db = Database(path)
+    db.init_db()
+
+    assert db.get_version() == 5
+    assert db.get_version("default") == 5
+    assert db.list_cohorts() == {"default": 5}
+    with db.read_snapshot("default") as snapshot:
+        roster = FeatureStore().load(snapshot)
+    assert sorted(roster.student_ids) == [f"S{i}" for i in range(5)]
+
+    # Starting again doesn't log the same students twice
+    db.init_db()
+    assert db.get_version() == 5
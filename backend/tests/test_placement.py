@@ -0,0 +1,54 @@
+# backend/tests/test_placement.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import Database
+from app.matching import MatchingService
+from app.models import StudentCreate
+from app.placement import PlacementIndex
+
+
+def _student(i: int, gender: str, prefers_ac: bool, room_capacity: int) -> StudentCreate:
+    answers = {q: 1 + (i * 7 + n) % 5 for n, q in enumerate([
+        'q1_sleep', 'q2_tidy', 'q3_noise', 'q4_friends_freq', 'q5_friday_pref',
+        'q6_overnight_guests', 'q7_conflict_style', 'q8_alone_time', 'q9_sports_games', 'q10_movies_music'
+    ])}
+    return StudentCreate(name=f"Student {i}", student_id=f"S{i}", contact_info="555", email=f"s{i}@example.com",
+                         prefers_ac=prefers_ac, room_capacity=room_capacity, gender=gender, **answers)
+
+
+def test_late_registrants_fill_matching_slots_only(tmp_path):
+    db = Database(str(tmp_path / "smartroomie.db"))
+    db.init_db()
+    # Five men (AC, 3-sharing) make a full room and one with a free slot; one woman is left out
+    roster = [_student(i, "Male", True, 3) for i in range(5)] + [_student(5, "Female", True, 3)]
+    db.create_students_bulk(enumerate(roster))
+    service = MatchingService(db)
+    with db.read_snapshot() as snapshot:
+        groups = service.calculate_groups(snapshot, seed=1)
+    assert sorted(len(group.member_ids) for group in groups) == [2, 3]
+    run_version = db.get_version()
+    run_id = db.save_match_run(groups, run_version)
+
+    late = [_student(10, "Male", True, 3), _student(11, "Female", True, 3),
+            _student(12, "Male", False, 2), _student(13, "Male", False, 2)]
+    for student in late:
+        db.create_student(student)
+    with db.read_snapshot() as snapshot:
+        features = service.features.load(snapshot)
+    late_ids = [s.student_id for s in db.get_changes_since(run_version)["students"]]
+    index = PlacementIndex(service, features, groups, run_id, "default", run_version, late_ids)
+
+    man, woman, first, second = [index.place(db.get_student(s.student_id)) for s in late]
+    # The man fills the open men's room, the woman is paired with the woman the run left out
+    assert man.placed and not man.new_group and len(index.groups[man.group]) == 3
+    assert woman.placed and woman.new_group and sorted(index.groups[woman.group]) == ["S11", "S5"]
+    # Two late registrants with nobody left out in their bucket aren't paired with each other
+    assert not first.placed and not second.placed
+
+    # Asking again for a placed student reports their group, with no error
+    again = index.place(db.get_student("S10"))
+    assert again.placed and again.group == man.group and again.error is None
@@ -0,0 +1,20 @@
+# backend/tests/test_profiling.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app import profiling
+
+
+def test_only_the_newest_profiles_are_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_KEEP", 3)
+    (tmp_path / "notes.txt").write_text("not a profile")
+
+    ids = [profiling.profile_call(lambda: sum(range(100)))[1]["profile_id"] for _ in range(5)]
+
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".prof")]) == 3
+    assert profiling.load_profile_path(ids[-1]) is not None
+    assert (tmp_path / "notes.txt").exists()
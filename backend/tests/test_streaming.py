@@ -0,0 +1,67 @@
+# backend/tests/test_streaming.py
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import Database
+from app.models import StudentCreate
+
+
+def _student(i: int) -> StudentCreate:
+    answers = {q: 1 + i % 5 for q in [
+        'q1_sleep', 'q2_tidy', 'q3_noise', 'q4_friends_freq', 'q5_friday_pref',
+        'q6_overnight_guests', 'q7_conflict_style', 'q8_alone_time', 'q9_sports_games', 'q10_movies_music'
+    ]}
+    return StudentCreate(name=f"Student {i}", student_id=f"S{i}", contact_info="555", email=f"s{i}@example.com",
+                         prefers_ac=bool(i % 2), room_capacity=2, gender="Female", **answers)
+
+
+def _next_on_new_thread(iterator):
+    """next(iterator) on a fresh thread, as Starlette does when streaming a response"""
+    result = {}
+
+    def step():
+        try:
+            result["value"] = next(iterator)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=step)
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+def _drain_across_threads(iterator):
+    items = []
+    while True:
+        try:
+            items.append(_next_on_new_thread(iterator))
+        except StopIteration:
+            return items
+
+
+def _database(tmp_path, students: int) -> Database:
+    db = Database(str(tmp_path / "smartroomie.db"))
+    db.init_db()
+    db.create_students_bulk((i, _student(i)) for i in range(students))
+    return db
+
+
+def test_export_batches_resume_on_other_threads(tmp_path):
+    db = _database(tmp_path, 25)
+    batches = _drain_across_threads(db.iter_student_batches(batch_size=10))
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+
+
+
+def test_archive_resumes_on_other_threads(tmp_path):
+    db = _database(tmp_path, 25)
+    progress = _drain_across_threads(db.archive_students(cohort="default", batch_size=10))
+    assert progress[-1] == {"archived": 25, "total": 25}
+    assert db.get_all_students() == []
@@ -0,0 +1,40 @@
+# backend/tests/test_text_scoring.py
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.database import Database
+from app.matching import MatchingService
+from app.models import StudentCreate
+
+# float32 TF-IDF weights put this description's cosine with itself just above 1.0
+DESCRIPTION = "movies coding music night early jazz"
+
+
+def _student(i: int) -> StudentCreate:
+    answers = {q: 3 for q in [
+        'q1_sleep', 'q2_tidy', 'q3_noise', 'q4_friends_freq', 'q5_friday_pref',
+        'q6_overnight_guests', 'q7_conflict_style', 'q8_alone_time', 'q9_sports_games', 'q10_movies_music'
+    ]}
+    return StudentCreate(name=f"Student {i}", student_id=f"S{i}", contact_info="555", email=f"s{i}@example.com",
+                         prefers_ac=True, room_capacity=2, gender="Female", self_description=DESCRIPTION,
+                         **answers)
+
+
+def test_identical_descriptions_score_at_most_one(tmp_path):
+    db = Database(str(tmp_path / "smartroomie.db"))
+    db.init_db()
+    db.create_students_bulk((i, _student(i)) for i in range(2))
+    service = MatchingService(db)
+
+    with db.read_snapshot() as snapshot:
+        groups = service.calculate_groups(snapshot, seed=1)
+        roster = service.features.load(snapshot)
+    assert len(groups) == 1
+    assert groups[0].domain_scores[-1] == 1.0
+
+    # The MatchResult view validates text_similarity <= 1
+    matches = service.to_match_results(groups, roster)
+    assert matches[0].text_similarity == 1.0
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+
+"""
+Smart Roomie - Cold start benchmark
+Measures how quickly a fresh process can serve the API:
+  * import time of app.main in a new interpreter
+  * time-to-first-request of a new uvicorn worker (spawn -> first 200 from /health)
+and which heavy modules (numpy, scipy, sklearn) were loaded by the import.
+
+Pass --baseline <git ref> to run the same measurements against another revision
+(extracted with git archive into a temp dir) and print both side by side.
+
+Run from the repository root:
+    python benchmarks/bench_cold_start.py
+    python benchmarks/bench_cold_start.py --runs 10 --baseline HEAD~1
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+HEAVY_MODULES = ("numpy", "scipy", "sklearn")
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_env(workdir: str) -> Dict[str, str]:
+    """Environment for a throwaway backend: its own database, quiet logs"""
+    env = dict(os.environ)
+    env["SMARTROOMIE_DB_PATH"] = os.path.join(workdir, "cold-start.db")
+    env["SMARTROOMIE_LOG_LEVEL"] = "WARNING"
+    return env
+
+
+def measure_import(backend_dir: str, workdir: str) -> Dict:
+    """Import app.main in a new interpreter and report its duration and heavy modules"""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], cwd=backend_dir, env=server_env(workdir),
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_first_request(backend_dir: str, workdir: str, timeout: float = 60.0) -> float:
+    """Seconds from spawning uvicorn until /health first answers 200"""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=backend_dir, env=server_env(workdir),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError, OSError):
+                pass
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            time.sleep(0.005)
+        raise RuntimeError("Server did not become healthy in time")
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(values) * 1000, 1),
+        "min_ms": round(min(values) * 1000, 1),
+        "max_ms": round(max(values) * 1000, 1)
+    }
+
+
+def run_suite(backend_dir: str, runs: int) -> Dict:
+    with tempfile.TemporaryDirectory(prefix="smartroomie-cold-") as workdir:
+        # One untimed import warms the OS page cache and bytecode caches for both measurements
+        measure_import(backend_dir, workdir)
+        imports = [measure_import(backend_dir, workdir) for _ in range(runs)]
+        first_requests = [measure_first_request(backend_dir, workdir) for _ in range(runs)]
+    return {
+        "import_app_main": summarize([r["seconds"] for r in imports]),
+        "time_to_first_request": summarize(first_requests),
+        "heavy_modules_loaded": imports[-1]["loaded"]
+    }
+
+
+def extract_revision(ref: str, target: str) -> str:
+    """Extract backend/ at a git ref into target and return its path"""
+    archive = os.path.join(target, "backend.tar")
+    subprocess.run(["git", "archive", "--format=tar", "-o", archive, ref, "backend"],
+                   cwd=REPO_ROOT, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(target)
+    return os.path.join(target, "backend")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and time-to-first-request of the Smart Roomie API")
+    parser.add_argument("--runs", type=int, default=5, help="Measurements per metric (median is reported)")
+    parser.add_argument("--baseline", help="Git ref to measure as well, e.g. HEAD~1")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {"runs": args.runs, "current": run_suite(os.path.join(REPO_ROOT, "backend"), args.runs)}
+    if args.baseline:
+        with tempfile.TemporaryDirectory(prefix="smartroomie-baseline-") as target:
+            report["baseline"] = run_suite(extract_revision(args.baseline, target), args.runs)
+        report["baseline_ref"] = args.baseline
+        report["time_to_first_request_speedup"] = round(
+            report["baseline"]["time_to_first_request"]["median_ms"]
+            / report["current"]["time_to_first_request"]["median_ms"], 2
+        )
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+
+"""
+Smart Roomie - Serialization benchmark
+Compares three ways of encoding large List[Student]/List[MatchResult] responses:
+- legacy: jsonable_encoder + json.dumps (what FastAPI did before its pydantic-core fast path)
+- response_model: the installed FastAPI's default path for a route with a response_model
+- FastJSONResponse: what the API returns now (no re-validation, pydantic-core/orjson encoding)
+
+Run from the repository root:
+    python benchmarks/bench_serialization.py [rows] [--repeats N]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+
+from app.models import Student, MatchResult
+from app.responses import FastJSONResponse
+
+QUESTIONS = ['q1_sleep', 'q2_tidy', 'q3_noise', 'q4_friends_freq', 'q5_friday_pref',
+             'q6_overnight_guests', 'q7_conflict_style', 'q8_alone_time', 'q9_sports_games', 'q10_movies_music']
+
+
+def make_students(count: int) -> List[Student]:
+    now = datetime.now()
+    return [
+        Student(
+            id=i, name=f"Student {i}", student_id=f"RA{i:06d}", contact_info="+91 9800000000",
+            email=f"student{i}@college.edu", prefers_ac=bool(i % 2), room_capacity=2 + i % 3,
+            gender=random.choice(['Male', 'Female']),
+            self_description="Easy-going person who loves reading books and novels.",
+            created_at=now, updated_at=now,
+            **{q: random.randint(1, 5) for q in QUESTIONS}
+        )
+        for i in range(count)
+    ]
+
+
+def make_matches(count: int) -> List[MatchResult]:
+    now = datetime.now()
+    return [
+        MatchResult(
+            student1_id=f"RA{i:06d}", student2_id=f"RA{i + 1:06d}",
+            student1_name=f"Student {i} + Student {i + 1} + Student {i + 2}", student2_name="3-sharing group",
+            compatibility_score=random.random(), habits_similarity=random.random(),
+            social_similarity=random.random(), conflict_similarity=random.random(),
+            interests_similarity=random.random(), constraints_matched=True,
+            match_explanation="Good compatibility with minor differences in 3-member group",
+            created_at=now
+        )
+        for i in range(count)
+    ]
+
+
+def build_app(students: List[Student], matches: List[MatchResult]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/before/students", response_model=List[Student])
+    async def students_before():
+        return students
+
+    @app.get("/after/students", response_model=List[Student])
+    async def students_after():
+        return FastJSONResponse(students)
+
+    @app.get("/before/matches", response_model=List[MatchResult])
+    async def matches_before():
+        return matches
+
+    @app.get("/after/matches", response_model=List[MatchResult])
+    async def matches_after():
+        return FastJSONResponse(matches)
+
+    return app
+
+
+def time_endpoint(client: TestClient, path: str, repeats: int) -> float:
+    client.get(path)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        response = client.get(path)
+        assert response.status_code == 200
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def time_call(func, repeats: int) -> float:
+    func()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare response encodings for large student/match lists")
+    parser.add_argument("rows", type=int, nargs="?", default=10_000, help="Students and matches to encode")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs averaged per measurement")
+    args = parser.parse_args()
+    rows, repeats = args.rows, args.repeats
+    data = {"students": make_students(rows), "matches": make_matches(rows)}
+    client = TestClient(build_app(data["students"], data["matches"]))
+
+    print(f"📊 Serialization benchmark: {rows} rows, mean of {repeats} runs")
+    print("   Encoding only (in-process):")
+    for kind, items in data.items():
+        legacy = time_call(lambda: json.dumps(jsonable_encoder(items)).encode("utf-8"), repeats)
+        fast = time_call(lambda: FastJSONResponse(items).body, repeats)
+        body = FastJSONResponse(items).body
+        print(f"   {kind:<9} legacy: {legacy:8.1f} ms   FastJSONResponse: {fast:8.1f} ms   "
+              f"({legacy / fast:.1f}x)   body {len(body) / 1024:.0f} KB, gzip {len(gzip.compress(body)) / 1024:.0f} KB")
+
+    print("   Full request through TestClient:")
+    for kind in data:
+        before = time_endpoint(client, f"/before/{kind}", repeats)
+        after = time_endpoint(client, f"/after/{kind}", repeats)
+        print(f"   {kind:<9} response_model: {before:8.1f} ms   FastJSONResponse: {after:8.1f} ms   "
+              f"({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+
+"""
+Smart Roomie - Concurrent HTTP load test
+Starts a local uvicorn instance (or targets --url), seeds a roster, then drives it with
+many asyncio clients running a weighted mix of registrations, roster reads, per-student
+match lookups and match runs. Prints a JSON report with throughput and p50/p95/p99
+latency per endpoint.
+
+Run from the repository root:
+    python benchmarks/load_test.py --clients 50 --duration 30
+    python benchmarks/load_test.py --storage memory --mix register=1,roster=4,lookup=4,match_run=1
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --output report.json
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_MIX = "register=2,roster=3,lookup=4,match_run=1"
+
+
+def load_data_generator():
+    """Reuse the student generator from generate-test-data.py (its filename isn't importable)"""
+    spec = importlib.util.spec_from_file_location(
+        "generate_test_data", os.path.join(REPO_ROOT, "generate-test-data.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ("register", "roster", "lookup", "match_run"):
+            raise ValueError(f"Unknown operation in --mix: {name}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, storage: str, workers: int) -> subprocess.Popen:
+    """Start uvicorn on a throwaway database so the real roster is never touched"""
+    env = dict(os.environ)
+    env["SMARTROOMIE_STORAGE"] = storage
+    env["SMARTROOMIE_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="smartroomie-load-"), "load.db")
+    env.setdefault("SMARTROOMIE_LOG_LEVEL", "WARNING")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=os.path.join(REPO_ROOT, "backend"),
+        env=env
+    )
+
+
+async def wait_for_server(client: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become healthy in time")
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, generator, weights: Dict[str, float]):
+        self.client = client
+        self.generator = generator
+        self.operations = list(weights)
+        self.weights = [weights[name] for name in self.operations]
+        self.student_ids: List[str] = []
+        self.latencies: Dict[str, List[float]] = {name: [] for name in self.operations}
+        self.statuses: Dict[str, Dict[str, int]] = {name: {} for name in self.operations}
+        self._ids = itertools.count()
+
+    def new_student(self) -> Dict:
+        data = self.generator.create_student_data()
+        # Generated IDs can collide; load-test IDs must be unique
+        data["student_id"] = f"LT{os.getpid()}-{next(self._ids)}"
+        return data
+
+    async def seed(self, count: int):
+        for _ in range(count):
+            data = self.new_student()
+            response = await self.client.post("/api/students", json=data)
+            if response.status_code == 200:
+                self.student_ids.append(data["student_id"])
+
+    async def request(self, operation: str):
+        if operation == "register":
+            data = self.new_student()
+            call = self.client.post("/api/students", json=data)
+        elif operation == "roster":
+            call = self.client.get("/api/students")
+        elif operation == "lookup":
+            call = self.client.get(f"/api/matches/{random.choice(self.student_ids)}")
+        else:
+            call = self.client.post("/api/matches")
+
+        start = time.perf_counter()
+        try:
+            response = await call
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        self.latencies[operation].append(time.perf_counter() - start)
+        self.statuses[operation][status] = self.statuses[operation].get(status, 0) + 1
+        if operation == "register" and status == "200":
+            self.student_ids.append(data["student_id"])
+
+    async def worker(self, deadline: float):
+        while time.monotonic() < deadline:
+            await self.request(random.choices(self.operations, self.weights)[0])
+
+    async def run(self, clients: int, duration: float) -> float:
+        start = time.monotonic()
+        await asyncio.gather(*(self.worker(start + duration) for _ in range(clients)))
+        return time.monotonic() - start
+
+    def report(self, elapsed: float, config: Dict) -> Dict:
+        endpoints = {}
+        total = 0
+        for operation in self.operations:
+            values = sorted(self.latencies[operation])
+            total += len(values)
+            endpoints[operation] = {
+                "requests": len(values),
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "statuses": self.statuses[operation],
+                "latency_ms": {
+                    "p50": round(percentile(values, 50) * 1000, 2),
+                    "p95": round(percentile(values, 95) * 1000, 2),
+                    "p99": round(percentile(values, 99) * 1000, 2),
+                    "max": round(values[-1] * 1000, 2) if values else 0.0,
+                    "mean": round(sum(values) / len(values) * 1000, 2) if values else 0.0
+                }
+            }
+        return {
+            "config": config,
+            "elapsed_seconds": round(elapsed, 2),
+            "total_requests": total,
+            "throughput_rps": round(total / elapsed, 2),
+            "endpoints": endpoints
+        }
+
+
+async def main_async(args) -> Dict:
+    generator = load_data_generator()
+    weights = parse_mix(args.mix)
+    server: Optional[subprocess.Popen] = None
+    base_url = args.url
+    if base_url is None:
+        port = free_port()
+        server = start_server(port, args.storage, args.workers)
+        base_url = f"http://127.0.0.1:{port}"
+
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+            await wait_for_server(client)
+            test = LoadTest(client, generator, weights)
+            await test.seed(args.seed_students)
+            if not test.student_ids:
+                raise RuntimeError("Seeding failed - no students were created")
+            elapsed = await test.run(args.clients, args.duration)
+            return test.report(elapsed, {
+                "url": base_url,
+                "clients": args.clients,
+                "duration": args.duration,
+                "mix": weights,
+                "seed_students": args.seed_students,
+                "storage": args.storage if server else "external",
+                "workers": args.workers if server else None
+            })
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for the Smart Roomie API")
+    parser.add_argument("--url", help="Target an already running server instead of starting one")
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent asyncio clients")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds to run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed-students", type=int, default=200, help="Students registered before the run")
+    parser.add_argument("--storage", choices=["sqlite", "memory"], default="sqlite", help="Backend for the local server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local server")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()